@@ -3,12 +3,18 @@ Flask Backend for Signal Analytics Dashboard
 Serves Arrow data directly from Snowflake
 """
 
+import mimetypes
 import os
+import re
 import sys
+import threading
+import time
 from datetime import timedelta
+from pathlib import Path
 import pyarrow as pa
-from flask import Flask, request, jsonify, send_from_directory
+from flask import Flask, Response, request, jsonify, send_from_directory
 from flask_cors import CORS
+from werkzeug.serving import is_running_from_reloader
 from database import get_snowflake_session, get_connection_status
 from routes.api_auth import auth_bp
 from routes.api_before_after import before_after_bp
@@ -22,78 +28,154 @@ from services import subscription_store
 from services.scheduler import start_scheduler
 from services.rate_limiter import rate_limiter
 from services import captcha_sessions
-from config import SECRET_KEY
+from config import (
+    SECRET_KEY,
+    USE_X_SENDFILE,
+    MAX_LEGEND_ENTITIES,
+    MAX_ANOMALY_LEGEND_ENTITIES,
+    MAX_BEFORE_AFTER_LEGEND_ENTITIES,
+    DEFAULT_START_HOUR,
+    DEFAULT_END_HOUR,
+    ANOMALY_MONITORING_THRESHOLD,
+    CHANGEPOINT_SEVERITY_THRESHOLD,
+    RUN_SCHEDULER,
+)
 from utils.client_identity import ensure_client_id_cookie, get_client_id
 from utils.exceptions import InvalidQueryParameter
+from utils.json_provider import OrjsonProvider, orjson
 
-# Download timezone database on Windows if needed
+# Download timezone database on Windows if needed. Arrow reads it from
+# %USERPROFILE%\Downloads\tzdata, so reuse an existing copy instead of
+# fetching it over the network on every start.
 if sys.platform == 'win32':
-    try:
-        pa.util.download_tzdata_on_windows()
-        print("✅ Timezone database downloaded")
-    except Exception as e:
-        print(f"⚠️  Failed to download timezone database: {e}")
+    tzdata_path = os.path.expandvars(r'%USERPROFILE%\Downloads\tzdata')
+    if not os.path.exists(os.path.join(tzdata_path, 'windowsZones.xml')):
+        try:
+            pa.util.download_tzdata_on_windows()
+            print("✅ Timezone database downloaded")
+        except Exception as e:
+            print(f"⚠️  Failed to download timezone database: {e}")
 
 app = Flask(__name__, static_folder='static/dist')
+if orjson is not None:
+    app.json = OrjsonProvider(app)
 app.config['SECRET_KEY'] = SECRET_KEY
 app.config['PERMANENT_SESSION_LIFETIME'] = timedelta(days=90)
+app.config['USE_X_SENDFILE'] = USE_X_SENDFILE
 CORS(app)
 
 subscription_store.initialize()
 
-if os.environ.get("PYTEST_CURRENT_TEST") is None:
+if RUN_SCHEDULER and os.environ.get("PYTEST_CURRENT_TEST") is None:
     start_scheduler()
 
-GENERAL_RATE_LIMITS = [
+
+def _warm_up_database():
+    """Log in to Snowflake off the request path so the first request finds a session"""
+    print("🔄 Warming up database connection...")
+    session = get_snowflake_session(retry=True, max_retries=3, retry_delay=2)
+    if session:
+        print("✅ Database connection established")
+    else:
+        print("⚠️  Database connection failed - will retry on first request")
+
+
+def start_database_warm_up():
+    """
+    Start the Snowflake login in a daemon thread.
+
+    Called once per serving process: from gunicorn's post_worker_init hook
+    (gunicorn.conf.py) and from the __main__ block below, never at import time,
+    so tests and scripts that import app do not log in. Requests that arrive
+    mid-login wait on the session lock instead of opening a second session.
+    """
+    threading.Thread(target=_warm_up_database, name="snowflake-warmup", daemon=True).start()
+
+GENERAL_RATE_LIMITS = (
     ("minute", 120, 60),
     ("hour", 2000, 3600),
-]
+)
+# (key prefix, limit, window) with the per-window key prefix built once
+_GENERAL_RATE_LIMIT_CHECKS = tuple(
+    (f"rate:{name}:cid:", limit, window) for name, limit, window in GENERAL_RATE_LIMITS
+)
 GENERAL_RATE_LIMIT_ENDPOINT_EXEMPTIONS = {"health_check", "connection_status"}
 GENERAL_RATE_LIMIT_PATH_PREFIX_EXEMPTIONS = ("/static/", "/favicon.ico")
 
+CAPTCHA_EXEMPT_PATHS = (
+    "/api/captcha",
+    "/api/health",
+)
+
+# Prefix checks compiled once so each hook call is a single regex match
+_RATE_LIMIT_EXEMPT_PATH_RE = re.compile("|".join(map(re.escape, GENERAL_RATE_LIMIT_PATH_PREFIX_EXEMPTIONS)))
+_CAPTCHA_EXEMPT_PATH_RE = re.compile("|".join(map(re.escape, CAPTCHA_EXEMPT_PATHS)))
 
+# Rejections are most frequent under abuse; serve them from pre-encoded bodies
+_RATE_LIMITED_BODY = app.json.dumps({"error": "Too many requests. Please slow down."}).encode("utf-8")
+_CAPTCHA_REQUIRED_BODY = app.json.dumps({"error": "captcha_required"}).encode("utf-8")
 
-@app.before_request
-def apply_global_rate_limit():
-    if request.method == "OPTIONS":
-        return None
 
-    endpoint = request.endpoint or ""
-    if endpoint in GENERAL_RATE_LIMIT_ENDPOINT_EXEMPTIONS:
+@app.before_request
+def guard_request():
+    """Apply the general rate limit, then require captcha verification for API calls."""
+    # Resolve the request proxy once; every attribute read below is then a plain lookup
+    req = request._get_current_object()
+    if req.method == "OPTIONS":
         return None
 
-    path = request.path or ""
-    if any(path.startswith(prefix) for prefix in GENERAL_RATE_LIMIT_PATH_PREFIX_EXEMPTIONS):
-        return None
+    path = req.path or ""
 
-    client_id = get_client_id()
-    for name, limit, window in GENERAL_RATE_LIMITS:
-        key = f"rate:{name}:cid:{client_id}"
-        allowed, retry_after = rate_limiter.allow(key, limit, window)
+    endpoint = req.endpoint or ""
+    if endpoint not in GENERAL_RATE_LIMIT_ENDPOINT_EXEMPTIONS and not _RATE_LIMIT_EXEMPT_PATH_RE.match(path):
+        client_id = get_client_id()
+        allowed, retry_after = rate_limiter.allow_many(
+            (key_prefix + client_id, limit, window)
+            for key_prefix, limit, window in _GENERAL_RATE_LIMIT_CHECKS
+        )
         if not allowed:
-            wait_seconds = max(1, int(retry_after or window))
-            response = jsonify({"error": "Too many requests. Please slow down."})
-            response.headers["Retry-After"] = str(wait_seconds)
-            return response, 429
+            wait_seconds = max(1, int(retry_after or 1))
+            return Response(
+                _RATE_LIMITED_BODY,
+                status=429,
+                headers={"Retry-After": str(wait_seconds)},
+                mimetype="application/json",
+            )
 
-    return None
+    if not path.startswith("/api/") or _CAPTCHA_EXEMPT_PATH_RE.match(path):
+        return None
+    if captcha_sessions.is_verified(req):
+        return None
+    return Response(_CAPTCHA_REQUIRED_BODY, status=401, mimetype="application/json")
 
 @app.after_request
 def deliver_client_id_cookie(response):
     return ensure_client_id_cookie(response)
 
 
+# Health is polled by every open dashboard; reuse the last result briefly
+# instead of re-checking the database connection on each poll.
+HEALTH_CACHE_TTL_SECONDS = 1.0
+_health_cache = (0.0, None)
+
+
 @app.route('/api/health')
 def health_check():
     """Health check endpoint with connection status"""
-    status = get_connection_status()
-    session = get_snowflake_session()
-    return jsonify({
-        'status': 'healthy' if session else 'unhealthy',
-        'database_connected': session is not None,
-        'connecting': status['connecting'],
-        'error': status['error']
-    })
+    global _health_cache
+    cached_at, body = _health_cache
+    now = time.monotonic()
+    if body is None or now - cached_at >= HEALTH_CACHE_TTL_SECONDS:
+        status = get_connection_status()
+        session = get_snowflake_session()
+        body = app.json.dumps({
+            'status': 'healthy' if session else 'unhealthy',
+            'database_connected': session is not None,
+            'connecting': status.connecting,
+            'error': status.error
+        })
+        _health_cache = (now, body)
+    return Response(body, mimetype='application/json')
 
 @app.route('/api/connection-status')
 def connection_status():
@@ -101,27 +183,22 @@ def connection_status():
     status = get_connection_status()
     return jsonify(status)
 
+# Frontend configuration is fixed for the life of the process, so serialize it once
+_CONFIG_JSON = app.json.dumps({
+    'maxLegendEntities': MAX_LEGEND_ENTITIES,
+    'maxAnomalyLegendEntities': MAX_ANOMALY_LEGEND_ENTITIES,
+    'maxBeforeAfterLegendEntities': MAX_BEFORE_AFTER_LEGEND_ENTITIES,
+    'defaultStartHour': DEFAULT_START_HOUR,
+    'defaultEndHour': DEFAULT_END_HOUR,
+    'anomalyMonitoringThreshold': ANOMALY_MONITORING_THRESHOLD,
+    'changepointSeverityThreshold': CHANGEPOINT_SEVERITY_THRESHOLD,
+})
+
+
 @app.route('/api/config')
 def get_config():
     """Get frontend configuration values"""
-    from config import (
-        MAX_LEGEND_ENTITIES,
-        MAX_ANOMALY_LEGEND_ENTITIES,
-        MAX_BEFORE_AFTER_LEGEND_ENTITIES,
-        DEFAULT_START_HOUR,
-        DEFAULT_END_HOUR,
-        ANOMALY_MONITORING_THRESHOLD,
-        CHANGEPOINT_SEVERITY_THRESHOLD,
-    )
-    return jsonify({
-        'maxLegendEntities': MAX_LEGEND_ENTITIES,
-        'maxAnomalyLegendEntities': MAX_ANOMALY_LEGEND_ENTITIES,
-        'maxBeforeAfterLegendEntities': MAX_BEFORE_AFTER_LEGEND_ENTITIES,
-        'defaultStartHour': DEFAULT_START_HOUR,
-        'defaultEndHour': DEFAULT_END_HOUR,
-        'anomalyMonitoringThreshold': ANOMALY_MONITORING_THRESHOLD,
-        'changepointSeverityThreshold': CHANGEPOINT_SEVERITY_THRESHOLD,
-    })
+    return Response(_CONFIG_JSON, mimetype='application/json')
 
 # Register blueprints
 app.register_blueprint(travel_time_bp, url_prefix='/api')
@@ -133,49 +210,62 @@ app.register_blueprint(subscriptions_bp, url_prefix='/api')
 app.register_blueprint(captcha_bp, url_prefix='/api')
 app.register_blueprint(admin_bp, url_prefix='/api')
 
-CAPTCHA_EXEMPT_PATHS = (
-    "/api/captcha",
-    "/api/health",
-)
-
-
-@app.before_request
-def enforce_captcha_verification():
-    if request.method == "OPTIONS":
-        return None
-    path = request.path or ""
-    if not path.startswith("/api/"):
-        return None
-    for exempt in CAPTCHA_EXEMPT_PATHS:
-        if path.startswith(exempt):
-            return None
-    if captcha_sessions.is_verified(request):
-        return None
-    return jsonify({"error": "captcha_required"}), 401
-
-
 @app.errorhandler(InvalidQueryParameter)
 def handle_invalid_query_parameter(error):
     message = str(error) or "Invalid request parameter."
     return jsonify({"error": message}), 400
 
+def _scan_static_files(folder):
+    """Return the set of built asset paths (POSIX, relative to folder)."""
+    if not os.path.isdir(folder):
+        return frozenset()
+    return frozenset(
+        path.relative_to(folder).as_posix()
+        for path in Path(folder).rglob('*')
+        if path.is_file()
+    )
+
+
+# static/dist only changes on deploy, so snapshot it once instead of
+# stat-ing the filesystem on every request. Restart after a rebuild.
+STATIC_FILES = _scan_static_files(app.static_folder)
+
+# Precompressed siblings written by the frontend build, in preference order
+PRECOMPRESSED_ENCODINGS = (
+    ("br", ".br"),
+    ("gzip", ".gz"),
+)
+
+
+def send_static_asset(path):
+    """Send a built asset, preferring a precompressed sibling the client accepts."""
+    for encoding, suffix in PRECOMPRESSED_ENCODINGS:
+        if not request.accept_encodings[encoding]:
+            continue
+        if path + suffix in STATIC_FILES:
+            mimetype = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+            response = send_from_directory(app.static_folder, path + suffix, mimetype=mimetype)
+            response.headers['Content-Encoding'] = encoding
+            break
+    else:
+        response = send_from_directory(app.static_folder, path)
+    response.vary.add('Accept-Encoding')
+    return response
+
+
 # Serve Vue.js app in production
 @app.route('/', defaults={'path': ''})
 @app.route('/<path:path>')
 def serve_vue_app(path):
     """Serve Vue.js application"""
-    if path != "" and os.path.exists(os.path.join(app.static_folder, path)):
-        return send_from_directory(app.static_folder, path)
+    if path != "" and path in STATIC_FILES:
+        return send_static_asset(path)
     else:
-        return send_from_directory(app.static_folder, 'index.html')
+        return send_static_asset('index.html')
 
 if __name__ == '__main__':
-    # Warm up database connection on startup
-    print("🔄 Warming up database connection...")
-    session = get_snowflake_session(retry=True, max_retries=3, retry_delay=2)
-    if session:
-        print("✅ Database connection established")
-    else:
-        print("⚠️  Database connection failed - will retry on first request")
-
-    app.run(debug=True, host='127.0.0.1', port=5000)
+    # The debug reloader runs this block in a watcher process and again in the
+    # serving child; only the child should log in.
+    if is_running_from_reloader():
+        start_database_warm_up()
+    app.run(debug=True, host='127.0.0.1', port=5000, threaded=True)
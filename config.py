@@ -23,6 +23,25 @@ DEBUG_DISABLE_SNOWFLAKE_CACHE = False
 # Enable/disable server-side result caching (geometry cache, etc.)
 DEBUG_DISABLE_SERVER_CACHE = False
 
+# =============================================================================
+# RESULT CACHE SETTINGS
+# =============================================================================
+
+# Seconds to reuse a serialized query result for identical filter requests
+RESULT_CACHE_TTL_SECONDS = int(os.environ.get('RESULT_CACHE_TTL_SECONDS', '300'))
+
+# Maximum number of cached results kept per worker (least recently used evicted)
+RESULT_CACHE_MAX_ENTRIES = int(os.environ.get('RESULT_CACHE_MAX_ENTRIES', '256'))
+
+# Results larger than this many bytes are sent but not cached
+RESULT_CACHE_MAX_ENTRY_BYTES = int(os.environ.get('RESULT_CACHE_MAX_ENTRY_BYTES', str(16 * 1024 * 1024)))
+
+# Total bytes of cached results kept per worker (least recently used evicted)
+RESULT_CACHE_MAX_BYTES = int(os.environ.get('RESULT_CACHE_MAX_BYTES', str(256 * 1024 * 1024)))
+
+# Seconds a browser may reuse an Arrow GET response before revalidating its ETag
+ARROW_RESPONSE_MAX_AGE_SECONDS = int(os.environ.get('ARROW_RESPONSE_MAX_AGE_SECONDS', '60'))
+
 # =============================================================================
 # FRONTEND DEBUG SETTINGS (referenced in API responses)
 # =============================================================================
@@ -88,6 +107,22 @@ CLIENT_ID_COOKIE_NAME = 'signal_client_id'
 CLIENT_ID_TOKEN_BYTES = 32
 CLIENT_ID_COOKIE_MAX_AGE = 365 * 24 * 60 * 60
 
+# =============================================================================
+# RATE LIMIT SETTINGS
+# =============================================================================
+
+# Redis connection URL for rate limiting shared across workers/instances.
+# When unset, each process keeps its own in-memory limits.
+RATE_LIMIT_REDIS_URL = os.environ.get('RATE_LIMIT_REDIS_URL')
+
+# =============================================================================
+# STATIC FILE SETTINGS
+# =============================================================================
+
+# Hand static asset bodies to the front-end server via the X-Sendfile header
+# (Apache mod_xsendfile, lighttpd). Only enable behind a server that honors it.
+USE_X_SENDFILE = os.environ.get('USE_X_SENDFILE', 'false').lower() == 'true'
+
 # =============================================================================
 # SUBSCRIPTION & AUTH SETTINGS
 # =============================================================================
@@ -127,6 +162,10 @@ ENABLE_DAILY_REPORTS = True
 DAILY_REPORT_SEND_HOUR = 6
 DAILY_REPORT_SEND_MINUTE = 0
 
+# Set RUN_SCHEDULER=false on web instances when the scheduler runs elsewhere.
+# Within one host only a single worker process runs it either way.
+RUN_SCHEDULER = os.environ.get('RUN_SCHEDULER', 'true').lower() == 'true'
+
 # =============================================================================
 # DEVELOPMENT HELPERS
 # =============================================================================
@@ -4,35 +4,54 @@ Database connection utilities for Snowflake
 
 import os
 import json
+import random
+import re
+import threading
 import time
-from snowflake.snowpark.session import Session
+from dataclasses import dataclass, replace
+from typing import Optional
+
+from config import DEBUG_DISABLE_SNOWFLAKE_CACHE
+from utils.exceptions import InvalidQueryParameter
+
+
+@dataclass(slots=True)
+class ConnectionStatus:
+    """Connection state shared by the session helpers and the status endpoints"""
+    connected: bool = False
+    connecting: bool = False
+    error: Optional[str] = None
+
 
 # Global session variable
 snowflake_session = None
-connection_status = {'connected': False, 'connecting': False, 'error': None}
+connection_status = ConnectionStatus()
 _cache_disabled = False  # Track if we've already disabled cache this session
 _force_new_session = False  # Flag to force creating new session instead of using get_active_session()
+_session_lock = threading.Lock()  # Serializes session creation across request threads
 
 def get_connection_status():
-    """Get current connection status"""
-    return connection_status.copy()
+    """Get a snapshot of the current connection status"""
+    return replace(connection_status)
+
+# Authentication/session error patterns that require reconnection:
+# - authentication token has expired
+# - 08001: connection error code
+# - 390111: session no longer exists error
+# - session no longer exists
+# - new login required
+_AUTH_ERROR_RE = re.compile(
+    r'authentication token has expired|08001|390111|session no longer exists|new login required',
+    re.IGNORECASE,
+)
 
 def is_auth_error(error):
     """Check if error is an authentication/session error that requires reconnection"""
-    error_str = str(error).lower()
-    # Check for various session/auth error patterns:
-    # - authentication token has expired
-    # - 08001: connection error code
-    # - 390111: session no longer exists error
-    # - session no longer exists
-    # - new login required
-    return (
-        'authentication token has expired' in error_str or
-        '08001' in error_str or
-        '390111' in error_str or
-        'session no longer exists' in error_str or
-        'new login required' in error_str
-    )
+    # Bad user input is never an auth problem; skip formatting and scanning the
+    # message, which may also echo user text that happens to contain "08001"
+    if isinstance(error, InvalidQueryParameter):
+        return False
+    return _AUTH_ERROR_RE.search(str(error)) is not None
 
 def invalidate_session():
     """Invalidate the current session to force reconnection"""
@@ -49,39 +68,51 @@ def invalidate_session():
             pass
 
     snowflake_session = None
-    connection_status['connected'] = False
-    connection_status['error'] = None
+    connection_status.connected = False
+    connection_status.error = None
     _cache_disabled = False
     _force_new_session = True  # Force creation of new session on next connection
     print("🔄 Session invalidated - will create new session on next query")
 
 def get_snowflake_session(retry=False, max_retries=3, retry_delay=2):
     """Get or create Snowflake session with retry logic"""
-    global snowflake_session, connection_status, _cache_disabled, _force_new_session
-
-    from config import DEBUG_DISABLE_SNOWFLAKE_CACHE
-
     # Return existing session if valid
+    # Don't run a health check every time - too many queries!
+    # Errors surface on actual queries and go through invalidate_session()
     if snowflake_session is not None:
-        try:
-            # Don't run health check every time - too many queries!
-            # Just return the session, errors will surface on actual queries
-            connection_status['connected'] = True
-            connection_status['error'] = None
-            return snowflake_session
-        except:
-            # Session is invalid, will recreate
-            snowflake_session = None
-            connection_status['connected'] = False
-            _cache_disabled = False
-
-    # If already connecting (from another thread), wait briefly
-    if connection_status['connecting'] and not retry:
-        time.sleep(1)
+        connection_status.connected = True
+        connection_status.error = None
+        return snowflake_session
+
+    # Single-flight: one thread logs in while concurrent callers wait for it
+    # instead of each opening their own session. Callers that did not ask to
+    # retry only wait briefly, as before.
+    if not _session_lock.acquire(timeout=-1 if retry else 1):
+        return snowflake_session
+    try:
         if snowflake_session is not None:
             return snowflake_session
+        return _connect(retry, max_retries, retry_delay)
+    finally:
+        _session_lock.release()
+
 
-    connection_status['connecting'] = True
+def _configure_new_session(session):
+    """Apply per-session settings once after a session is created"""
+    global _cache_disabled
+
+    # Disable Snowflake query result cache if configured (ONCE per session)
+    if DEBUG_DISABLE_SNOWFLAKE_CACHE and not _cache_disabled:
+        session.sql("ALTER SESSION SET USE_CACHED_RESULT = FALSE").collect()
+        print("Snowflake query result cache DISABLED")
+        _cache_disabled = True
+
+
+def _connect(retry, max_retries, retry_delay):
+    """Create a new Snowflake session; caller must hold _session_lock"""
+    global snowflake_session, connection_status, _force_new_session
+
+    connection_status.connecting = True
     attempts = max_retries if retry else 1
 
     for attempt in range(attempts):
@@ -95,17 +126,10 @@ def get_snowflake_session(retry=False, max_retries=3, retry_delay=2):
                 print(f"Attempting to connect to database (attempt {attempt + 1}/{attempts})...")
                 snowflake_session = get_active_session()
                 print("Connected using active session")
-                connection_status['connected'] = True
-                connection_status['connecting'] = False
-                connection_status['error'] = None
-
-                # Disable Snowflake query result cache if configured (ONCE per session)
-                from config import DEBUG_DISABLE_SNOWFLAKE_CACHE
-                if DEBUG_DISABLE_SNOWFLAKE_CACHE and not _cache_disabled:
-                    snowflake_session.sql("ALTER SESSION SET USE_CACHED_RESULT = FALSE").collect()
-                    print("Snowflake query result cache DISABLED")
-                    _cache_disabled = True
-
+                connection_status.connected = True
+                connection_status.connecting = False
+                connection_status.error = None
+                _configure_new_session(snowflake_session)
                 return snowflake_session
             except Exception as e:
                 # Only print if it's not the expected "No default Session" error
@@ -118,43 +142,49 @@ def get_snowflake_session(retry=False, max_retries=3, retry_delay=2):
             if _force_new_session:
                 print(f"🔄 Creating new session with connection parameters (attempt {attempt + 1}/{attempts})...")
 
+            # Imported on first connect (off the main thread via the startup
+            # warm-up) so importing the app doesn't wait on Snowpark
+            from snowflake.snowpark.session import Session
+
             # Fallback to connection parameters
             raw_conn = os.environ.get("SNOWFLAKE_CONNECTION")
             if not raw_conn:
-                raise Exception("SNOWFLAKE_CONNECTION environment variable must be set")
+                raise ValueError("SNOWFLAKE_CONNECTION environment variable must be set")
             connection_parameters = json.loads(raw_conn)
             if not connection_parameters:
-                raise Exception("SNOWFLAKE_CONNECTION environment variable is empty")
+                raise ValueError("SNOWFLAKE_CONNECTION environment variable is empty")
+            # The session is shared for the life of the process; keep it alive
+            # through idle periods so the first request after a quiet spell
+            # doesn't hit an expired token and a reconnect
+            connection_parameters.setdefault("client_session_keep_alive", True)
 
             snowflake_session = Session.builder.configs(connection_parameters).create()
             print("✅ Connected using connection parameters")
-            connection_status['connected'] = True
-            connection_status['connecting'] = False
-            connection_status['error'] = None
+            connection_status.connected = True
+            connection_status.connecting = False
+            connection_status.error = None
             _force_new_session = False  # Reset flag after successful connection
-
-            # Disable Snowflake query result cache if configured (ONCE per session)
-            from config import DEBUG_DISABLE_SNOWFLAKE_CACHE
-            if DEBUG_DISABLE_SNOWFLAKE_CACHE and not _cache_disabled:
-                snowflake_session.sql("ALTER SESSION SET USE_CACHED_RESULT = FALSE").collect()
-                print("Snowflake query result cache DISABLED")
-                _cache_disabled = True
-
+            _configure_new_session(snowflake_session)
             return snowflake_session
 
         except Exception as e:
             error_msg = f"Failed to connect to database: {e}"
             print(error_msg)
-            connection_status['error'] = str(e)
-
-            # Retry if requested and not the last attempt
-            if retry and attempt < attempts - 1:
-                print(f"Retrying in {retry_delay} seconds...")
-                time.sleep(retry_delay)
+            connection_status.error = str(e)
+
+            # Retry if requested and not the last attempt. Missing or malformed
+            # connection settings (ValueError, incl. JSONDecodeError) never fix
+            # themselves, so fail fast instead of sleeping through retries.
+            if retry and attempt < attempts - 1 and not isinstance(e, ValueError):
+                # Exponential backoff with jitter so workers that failed together
+                # don't all reconnect on the same tick
+                delay = min(30, retry_delay * (2 ** attempt)) * random.uniform(0.5, 1.5)
+                print(f"Retrying in {delay:.1f} seconds...")
+                time.sleep(delay)
                 continue
 
-            connection_status['connecting'] = False
+            connection_status.connecting = False
             return None
 
-    connection_status['connecting'] = False
+    connection_status.connecting = False
     return None
@@ -197,12 +197,9 @@ class ApiService {
     return this.fetchArrowData('/travel-time-by-time-of-day', params)
   }
 
-  async getAnomalySummary(filters) {
-    return this.fetchArrowData('/anomaly-summary', filters)
-  }
-
-  async getAnomalySummaryXd(filters) {
-    return this.fetchArrowData('/anomaly-summary-xd', filters)
+  // Signal- and XD-level metrics in one request (signal rows have XD null, XD rows have ID null)
+  async getAnomalySummaryCombined(filters) {
+    return this.fetchArrowData('/anomaly-summary-combined', filters)
   }
 
   async getAnomalyAggregated(filters, legendBy = null) {
@@ -1,6 +1,49 @@
 import { defineConfig } from 'vite'
 import vue from '@vitejs/plugin-vue'
 import vuetify from 'vite-plugin-vuetify'
+import { readdirSync, readFileSync, writeFileSync } from 'node:fs'
+import { extname, join, resolve } from 'node:path'
+import { brotliCompressSync, gzipSync, constants as zlibConstants } from 'node:zlib'
+
+const PRECOMPRESS_EXTENSIONS = new Set(['.html', '.js', '.mjs', '.css', '.svg', '.json', '.txt', '.ttf', '.eot'])
+const PRECOMPRESS_MIN_BYTES = 1024
+
+// Write .br and .gz siblings next to each text asset so Flask can send them
+// as-is instead of compressing on every request.
+function precompressAssets() {
+  let outDir
+  const walk = (dir) => {
+    for (const entry of readdirSync(dir, { withFileTypes: true })) {
+      const file = join(dir, entry.name)
+      if (entry.isDirectory()) {
+        walk(file)
+        continue
+      }
+      if (!PRECOMPRESS_EXTENSIONS.has(extname(entry.name))) continue
+      const source = readFileSync(file)
+      if (source.length < PRECOMPRESS_MIN_BYTES) continue
+      const brotli = brotliCompressSync(source, {
+        params: {
+          [zlibConstants.BROTLI_PARAM_QUALITY]: zlibConstants.BROTLI_MAX_QUALITY,
+          [zlibConstants.BROTLI_PARAM_SIZE_HINT]: source.length,
+        },
+      })
+      if (brotli.length < source.length) writeFileSync(`${file}.br`, brotli)
+      const gzip = gzipSync(source, { level: zlibConstants.Z_BEST_COMPRESSION })
+      if (gzip.length < source.length) writeFileSync(`${file}.gz`, gzip)
+    }
+  }
+  return {
+    name: 'precompress-assets',
+    apply: 'build',
+    configResolved(config) {
+      outDir = resolve(config.root, config.build.outDir)
+    },
+    closeBundle() {
+      walk(outDir)
+    },
+  }
+}
 
 export default defineConfig({
   plugins: [
@@ -8,6 +51,7 @@ export default defineConfig({
     vuetify({
       autoImport: true,
     }),
+    precompressAssets(),
   ],
   envPrefix: ['VITE_', 'APP_'],
   server: {
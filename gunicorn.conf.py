@@ -0,0 +1,11 @@
+"""
+Gunicorn settings for the Procfile command.
+"""
+
+
+def post_worker_init(worker):
+    # Each worker has just imported app; log in to Snowflake in the background
+    # so its first request finds a session.
+    from app import start_database_warm_up
+
+    start_database_warm_up()
@@ -4,12 +4,16 @@ Admin utilities for inspecting the subscriptions database through a protected AP
 
 from __future__ import annotations
 
+import hmac
+import queue
+import re
 import sqlite3
 import time
+from contextlib import contextmanager
 from datetime import date, datetime
-from typing import Any, Dict, List, Tuple
+from typing import Any, Dict, Iterator, List, Tuple
 
-from flask import Blueprint, jsonify, request, session
+from flask import Blueprint, g, jsonify, request, session
 from utils.client_identity import get_client_id
 
 from config import SECRET_KEY, SUBSCRIPTION_DB_PATH
@@ -21,7 +25,23 @@ ADMIN_LOGIN_LIMIT = 3
 ADMIN_LOGIN_WINDOW_SECONDS = 24 * 60 * 60
 ADMIN_SESSION_TTL_SECONDS = 90 * 24 * 60 * 60  # Require re-authentication after 90 days
 MAX_RESULT_ROWS = 500
+READ_POOL_SIZE = 4
+# First token must be one of these keywords, as a whole word
+_ALLOWED_SQL_RE = re.compile(r"(?:SELECT|WITH|PRAGMA)(?:\s|$)", re.IGNORECASE)
 
+# Per-connection settings for pooled readers: memory-mapped reads, a page
+# cache that survives between queries, in-memory temp tables for sorts and
+# GROUP BYs, and no writes.
+_CONNECTION_PRAGMAS = (
+    "PRAGMA mmap_size = 268435456",
+    "PRAGMA cache_size = -16384",
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA query_only = ON",
+)
+
+# Idle read-only connections reused across admin requests so each request
+# doesn't reopen the database file and start with a cold page cache.
+_read_pool: "queue.Queue[sqlite3.Connection]" = queue.Queue(maxsize=READ_POOL_SIZE)
 
 
 def _check_secret_key() -> Tuple[bool, Any]:
@@ -34,6 +54,15 @@ def _check_secret_key() -> Tuple[bool, Any]:
 
 
 def _require_admin_session() -> bool:
+    cached = getattr(g, "admin_authenticated", None)
+    if cached is not None:
+        return cached
+
+    g.admin_authenticated = _check_admin_session()
+    return g.admin_authenticated
+
+
+def _check_admin_session() -> bool:
     if not session.get("admin_authenticated"):
         return False
     authenticated_at = session.get("admin_authenticated_at")
@@ -52,18 +81,39 @@ def _ensure_admin_session():
     return jsonify({"error": "admin_auth_required"}), 401
 
 
-def _open_db() -> sqlite3.Connection:
+def _connect_read_only() -> sqlite3.Connection:
     conn = sqlite3.connect(
         SUBSCRIPTION_DB_PATH,
         detect_types=sqlite3.PARSE_DECLTYPES,
         check_same_thread=False,
     )
-    conn.row_factory = sqlite3.Row
-    conn.execute("PRAGMA foreign_keys = ON")
-    conn.execute("PRAGMA query_only = ON")
+    # No row_factory: results are consumed by position, so plain tuples
+    # avoid sqlite3.Row's per-row object and name index. Foreign keys are
+    # left off too, since they are only enforced on writes.
     return conn
 
 
+@contextmanager
+def _open_db() -> Iterator[sqlite3.Connection]:
+    """Borrow a read-only connection from the pool, opening one if none is idle."""
+    try:
+        conn = _read_pool.get_nowait()
+    except queue.Empty:
+        conn = _connect_read_only()
+    # Re-applied on every checkout: admin queries may run PRAGMA statements,
+    # so a pooled connection may have been retuned or left writable by the
+    # previous borrower.
+    for pragma in _CONNECTION_PRAGMAS:
+        conn.execute(pragma)
+    try:
+        yield conn
+    finally:
+        try:
+            _read_pool.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+
 def _normalize_sql(sql: str) -> str:
     return (sql or "").strip()
 
@@ -73,8 +123,7 @@ def _validate_sql(sql: str) -> Tuple[bool, str | None]:
     if not normalized:
         return False, "Query must not be empty."
 
-    first_token = normalized.split(None, 1)[0].upper()
-    if first_token in {"SELECT", "WITH", "PRAGMA"}:
+    if _ALLOWED_SQL_RE.match(normalized):
         return True, None
     return False, "Only SELECT, WITH, or PRAGMA statements are allowed."
 
@@ -100,13 +149,14 @@ def admin_login():
         response.headers["Retry-After"] = str(wait_seconds)
         return response, 429
 
-    if password != SECRET_KEY:
+    if not hmac.compare_digest(password.encode("utf-8"), SECRET_KEY.encode("utf-8")):
         return jsonify({"error": "Invalid password"}), 401
 
     # Reset the limiter after a successful login so new attempts are available.
     rate_limiter.clear(key)
     session["admin_authenticated"] = True
     session["admin_authenticated_at"] = int(time.time())
+    g.admin_authenticated = True
     session.permanent = True
 
     return jsonify({"authenticated": True})
@@ -127,7 +177,7 @@ def list_tables():
             ORDER BY name
             """
         )
-        tables = [row["name"] for row in cursor.fetchall()]
+        tables = [row[0] for row in cursor.fetchall()]
 
     return jsonify({"tables": tables})
 
@@ -139,13 +189,29 @@ def _execute_read_query(sql: str) -> Tuple[List[str], List[Dict[str, Any]], bool
         raw_rows = cursor.fetchmany(MAX_RESULT_ROWS + 1)
         truncated = len(raw_rows) > MAX_RESULT_ROWS
         limited_rows = raw_rows[:MAX_RESULT_ROWS]
-        rows = [
-            {col: _serialize_value(row[col]) for col in columns}
-            for row in limited_rows
-        ]
+
+    # Work column by column: most columns hold only JSON-native values and
+    # can skip per-cell conversion entirely. SQLite typing is per value, so
+    # a column is converted whenever any of its values needs it.
+    value_columns = [list(values) for values in zip(*limited_rows)]
+    for index, values in enumerate(value_columns):
+        if any(isinstance(value, _CONVERTED_TYPES) for value in values):
+            value_columns[index] = [_serialize_value(value) for value in values]
+
+    # Duplicate column names resolve to the first match, as with row[col]
+    positions: Dict[str, int] = {}
+    for index, col in enumerate(columns):
+        positions.setdefault(col, index)
+    rows = [
+        {col: values[index] for col, index in positions.items()}
+        for values in zip(*value_columns)
+    ]
     return columns, rows, truncated
 
 
+_CONVERTED_TYPES = (date, bytes)  # datetime is a subclass of date
+
+
 def _serialize_value(value: Any) -> Any:
     if isinstance(value, datetime):
         return value.isoformat()
@@ -4,44 +4,48 @@ Optimized for low-latency small queries
 """
 
 import pyarrow as pa
+import pyarrow.compute as pc
 from flask import Blueprint, request, jsonify
 
 from config import MAX_ANOMALY_LEGEND_ENTITIES
 from database import get_snowflake_session, is_auth_error
-from services.report_service import fetch_monitoring_anomaly_rows
 from utils.error_handler import handle_auth_error_retry
 from utils.arrow_utils import (
     serialize_arrow_to_ipc,
     create_empty_arrow_response,
     create_arrow_response,
-    snowflake_result_to_arrow
+    cached_query_to_ipc,
+    stream_cached_query,
+    add_conditional_cache_headers
 )
 from utils.query_utils import (
     normalize_date,
     build_xd_dimension_query,
-    extract_xd_values,
     build_xd_filter,
-    build_xd_filter_with_joins,
+    build_xd_predicate,
     build_filter_joins_and_where,
-    create_xd_lookup_dict,
-    get_aggregation_table,
-    build_time_of_day_filter,
+    build_time_of_day_predicate,
     build_day_of_week_filter,
     get_aggregation_level,
     build_legend_join,
     build_legend_filter
 )
 from utils.request_helpers import get_request_param, get_request_param_list
+from utils.result_cache import result_cache
 
 anomalies_bp = Blueprint('anomalies', __name__)
 
+# Repeat views (pans, toggles, page switches) revalidate instead of refetching
+anomalies_bp.after_request(add_conditional_cache_headers)
 
-@anomalies_bp.route('/anomaly-summary', methods=['GET', 'POST'])
-def get_anomaly_summary():
-    """Get anomaly summary data for map visualization as Arrow (metrics only)
 
-    OPTIMIZATION: Returns only ID and metrics (no dimension data like NAME, LATITUDE, LONGITUDE)
-    Dimension data should be cached on client from /dim-signals endpoint
+def _summary_from_and_where():
+    """
+    Parse the map filters shared by the anomaly summary routes.
+
+    Returns:
+        Tuple of (from_clause, where_clause) for TRAVEL_TIME_ANALYTICS t joined
+        to DIM_SIGNALS_XD xd and DIM_SIGNALS s
     """
     # Get query parameters (supports both GET and POST)
     start_date = get_request_param('start_date')
@@ -50,7 +54,6 @@ def get_anomaly_summary():
     maintained_by = get_request_param('maintained_by', 'all')
     approach = get_request_param('approach')
     valid_geometry = get_request_param('valid_geometry')
-    anomaly_type = get_request_param('anomaly_type', 'All')
     start_hour = get_request_param('start_hour')
     start_minute = get_request_param('start_minute')
     end_hour = get_request_param('end_hour')
@@ -62,69 +65,102 @@ def get_anomaly_summary():
     end_date_str = normalize_date(end_date)
 
     # Build time-of-day filter
-    time_filter = build_time_of_day_filter(start_hour, start_minute, end_hour, end_minute)
+    time_predicate = build_time_of_day_predicate(start_hour, start_minute, end_hour, end_minute)
 
     # Build day-of-week filter
     dow_filter = build_day_of_week_filter(day_of_week)
 
-    def execute_query():
-        session = get_snowflake_session(retry=True, max_retries=2)
-        if not session:
-            raise Exception("Unable to establish database connection")
-
-        # Build filter joins for efficient SQL filtering
-        filter_join, filter_where = build_filter_joins_and_where(
-            signal_ids, maintained_by, approach, valid_geometry
-        )
+    # Build filter joins for efficient SQL filtering
+    filter_join, filter_where = build_filter_joins_and_where(
+        signal_ids, maintained_by, approach, valid_geometry
+    )
 
-        # Build WHERE clause parts
-        where_parts = [f"t.DATE_ONLY BETWEEN '{start_date_str}' AND '{end_date_str}'"]
+    # Build WHERE clause parts
+    where_parts = [f"t.DATE_ONLY BETWEEN '{start_date_str}' AND '{end_date_str}'"]
 
-        if filter_where:
-            where_parts.append(filter_where)
+    if filter_where:
+        where_parts.append(filter_where)
 
-        if time_filter:
-            clean_time = time_filter.strip()
-            if clean_time.startswith('AND '):
-                clean_time = clean_time[4:]
-            clean_time = clean_time.replace('TIME_15MIN', 't.TIME_15MIN')
-            where_parts.append(clean_time)
+    if time_predicate:
+        where_parts.append(time_predicate)
 
-        where_clause = " AND ".join(where_parts)
+    where_clause = " AND ".join(where_parts)
 
-        # Build FROM clause
-        from_clause = f"""FROM TRAVEL_TIME_ANALYTICS t
+    # Build FROM clause
+    from_clause = f"""FROM TRAVEL_TIME_ANALYTICS t
         {dow_filter}
         INNER JOIN DIM_SIGNALS_XD xd ON t.XD = xd.XD
         INNER JOIN DIM_SIGNALS s ON xd.ID = s.ID"""
 
-        # Single query that does all filtering in SQL - SIGNAL-LEVEL aggregation
-        # Groups by signal only (not XD) to return one row per signal
-        # OPTIMIZATION: Returns only ID and metrics (no dimension data like NAME, LATITUDE, LONGITUDE)
-        # Dimension data should be cached on client from /dim-signals endpoint
-        analytics_query = f"""
+    return from_clause, where_clause
+
+
+def _combined_summary_query():
+    """
+    Signal-level and XD-level anomaly metrics from one scan.
+
+    GROUPING SETS reads TRAVEL_TIME_ANALYTICS once for both levels. Signal
+    rows have a null XD and XD rows have a null ID. No ORDER BY: the map
+    looks metrics up by ID and XD, so row order is unused.
+    """
+    from_clause, where_clause = _summary_from_and_where()
+    return f"""
         SELECT
             s.ID,
+            xd.XD,
             SUM(CASE WHEN t.ANOMALY = TRUE THEN 1 ELSE 0 END) AS ANOMALY_COUNT,
             SUM(CASE WHEN t.ORIGINATED_ANOMALY = TRUE THEN 1 ELSE 0 END) AS POINT_SOURCE_COUNT,
             COUNT(*) AS RECORD_COUNT
         {from_clause}
         WHERE {where_clause}
-        GROUP BY s.ID
-        ORDER BY s.ID
+        GROUP BY GROUPING SETS ((s.ID), (xd.XD))
         """
 
-        arrow_data = session.sql(analytics_query).to_arrow()
-        arrow_bytes = snowflake_result_to_arrow(arrow_data)
+
+def _summary_level(arrow_bytes: bytes, other_key: str) -> bytes:
+    """Keep the combined summary rows where other_key is null, without that column"""
+    table = pa.ipc.open_stream(arrow_bytes).read_all()
+    table = table.filter(pc.is_null(table.column(other_key)))
+    return serialize_arrow_to_ipc(table.drop_columns([other_key]))
+
+
+def _summary_response(route, error_message, other_key=None):
+    """
+    Serve the combined summary through the result cache with the usual error
+    handling. With other_key, only one level's rows are returned; both levels
+    share the combined query's cache entry.
+    """
+    query = _combined_summary_query()
+
+    def execute_query():
+        session = get_snowflake_session(retry=True, max_retries=2)
+        if not session:
+            raise Exception("Unable to establish database connection")
+
+        arrow_bytes = cached_query_to_ipc(session, query)
+        if other_key is not None:
+            arrow_bytes = _summary_level(arrow_bytes, other_key)
         return create_arrow_response(arrow_bytes)
 
     try:
         return handle_auth_error_retry(execute_query)
     except Exception as e:
-        print(f"[ERROR] /anomaly-summary: {e}")
+        print(f"[ERROR] {route}: {e}")
         if is_auth_error(e):
             return "Database reconnecting - please wait", 503
-        return f"Error fetching anomaly data: {e}", 500
+        return error_message, 500
+
+
+@anomalies_bp.route('/anomaly-summary', methods=['GET', 'POST'])
+def get_anomaly_summary():
+    """Get anomaly summary data for map visualization as Arrow (metrics only)
+
+    OPTIMIZATION: Returns only ID and metrics (no dimension data like NAME, LATITUDE, LONGITUDE)
+    Dimension data should be cached on client from /dim-signals endpoint
+
+    Signal-level rows of /anomaly-summary-combined, one row per signal.
+    """
+    return _summary_response('/anomaly-summary', "Error fetching anomaly data", other_key='XD')
 
 
 @anomalies_bp.route('/anomaly-summary-xd', methods=['GET', 'POST'])
@@ -133,89 +169,20 @@ def get_anomaly_summary_xd():
 
     OPTIMIZATION: Returns only XD and metrics (no dimension data like BEARING, ROADNAME, etc.)
     Dimension data should be cached on client from /dim-signals-xd endpoint
-    """
-    # Get query parameters (supports both GET and POST)
-    start_date = get_request_param('start_date')
-    end_date = get_request_param('end_date')
-    signal_ids = get_request_param_list('signal_ids')
-    maintained_by = get_request_param('maintained_by', 'all')
-    approach = get_request_param('approach')
-    valid_geometry = get_request_param('valid_geometry')
-    anomaly_type = get_request_param('anomaly_type', 'All')
-    start_hour = get_request_param('start_hour')
-    start_minute = get_request_param('start_minute')
-    end_hour = get_request_param('end_hour')
-    end_minute = get_request_param('end_minute')
-    day_of_week = get_request_param_list('day_of_week')
-
-    # Normalize dates
-    start_date_str = normalize_date(start_date)
-    end_date_str = normalize_date(end_date)
-
-    # Build time-of-day filter
-    time_filter = build_time_of_day_filter(start_hour, start_minute, end_hour, end_minute)
 
-    # Build day-of-week filter
-    dow_filter = build_day_of_week_filter(day_of_week)
-
-    def execute_query():
-        session = get_snowflake_session(retry=True, max_retries=2)
-        if not session:
-            raise Exception("Unable to establish database connection")
-
-        # Build filter joins for efficient SQL filtering
-        filter_join, filter_where = build_filter_joins_and_where(
-            signal_ids, maintained_by, approach, valid_geometry
-        )
-
-        # Build WHERE clause parts
-        where_parts = [f"t.DATE_ONLY BETWEEN '{start_date_str}' AND '{end_date_str}'"]
-
-        if filter_where:
-            where_parts.append(filter_where)
-
-        if time_filter:
-            clean_time = time_filter.strip()
-            if clean_time.startswith('AND '):
-                clean_time = clean_time[4:]
-            clean_time = clean_time.replace('TIME_15MIN', 't.TIME_15MIN')
-            where_parts.append(clean_time)
-
-        where_clause = " AND ".join(where_parts)
-
-        # Build FROM clause
-        from_clause = f"""FROM TRAVEL_TIME_ANALYTICS t
-        {dow_filter}
-        INNER JOIN DIM_SIGNALS_XD xd ON t.XD = xd.XD
-        INNER JOIN DIM_SIGNALS s ON xd.ID = s.ID"""
+    XD-level rows of /anomaly-summary-combined, one row per XD segment.
+    """
+    return _summary_response('/anomaly-summary-xd', "Error fetching XD anomaly summary", other_key='ID')
 
-        # Single query that does all filtering in SQL - XD-LEVEL aggregation
-        # Groups by XD to return one row per XD segment
-        # OPTIMIZATION: Returns only XD and metrics (no dimension data like BEARING, ROADNAME, etc.)
-        # Dimension data should be cached on client from /dim-signals-xd endpoint
-        analytics_query = f"""
-        SELECT
-            xd.XD,
-            SUM(CASE WHEN t.ANOMALY = TRUE THEN 1 ELSE 0 END) AS ANOMALY_COUNT,
-            SUM(CASE WHEN t.ORIGINATED_ANOMALY = TRUE THEN 1 ELSE 0 END) AS POINT_SOURCE_COUNT,
-            COUNT(*) AS RECORD_COUNT
-        {from_clause}
-        WHERE {where_clause}
-        GROUP BY xd.XD
-        ORDER BY xd.XD
-        """
 
-        arrow_data = session.sql(analytics_query).to_arrow()
-        arrow_bytes = snowflake_result_to_arrow(arrow_data)
-        return create_arrow_response(arrow_bytes)
+@anomalies_bp.route('/anomaly-summary-combined', methods=['GET', 'POST'])
+def get_anomaly_summary_combined():
+    """Get signal-level and XD-level anomaly metrics from one scan as Arrow
 
-    try:
-        return handle_auth_error_retry(execute_query)
-    except Exception as e:
-        print(f"[ERROR] /anomaly-summary-xd: {e}")
-        if is_auth_error(e):
-            return "Database reconnecting - please wait", 503
-        return f"Error fetching XD anomaly summary: {e}", 500
+    Same rows as /anomaly-summary plus /anomaly-summary-xd. Signal rows have
+    a null XD and XD rows have a null ID.
+    """
+    return _summary_response('/anomaly-summary-combined', "Error fetching anomaly data")
 
 
 @anomalies_bp.route('/anomaly-aggregated', methods=['GET', 'POST'])
@@ -244,7 +211,7 @@ def get_anomaly_aggregated():
     agg_level = get_aggregation_level(start_date_str, end_date_str)
 
     # Build time-of-day filter
-    time_filter = build_time_of_day_filter(start_hour, start_minute, end_hour, end_minute)
+    time_predicate = build_time_of_day_predicate(start_hour, start_minute, end_hour, end_minute)
 
     # Build day-of-week filter
     dow_filter = build_day_of_week_filter(day_of_week)
@@ -258,7 +225,7 @@ def get_anomaly_aggregated():
         if xd_segments:
             # Map interaction - use direct XD list (small, efficient)
             xd_values = [int(xd) for xd in xd_segments]
-            xd_filter = build_xd_filter(xd_values)
+            xd_predicate = build_xd_predicate(xd_values)
             filter_join = ""
             filter_where = ""
         elif signal_ids or maintained_by != 'all' or approach or (valid_geometry and valid_geometry != 'all'):
@@ -266,10 +233,10 @@ def get_anomaly_aggregated():
             filter_join, filter_where = build_filter_joins_and_where(
                 signal_ids, maintained_by, approach, valid_geometry
             )
-            xd_filter = ""  # No XD list needed - filtering via joins
+            xd_predicate = ""
         else:
             # NO filters - query all
-            xd_filter = ""
+            xd_predicate = ""
             filter_join = ""
             filter_where = ""
 
@@ -300,24 +267,16 @@ def get_anomaly_aggregated():
         where_parts.append("t.PREDICTION IS NOT NULL")
 
         # Add XD filter if present (for map interactions with xd_segments)
-        if xd_filter:
-            clean_xd = xd_filter.strip()
-            if clean_xd.startswith('AND '):
-                clean_xd = clean_xd[4:]
-            clean_xd = clean_xd.replace('XD', 't.XD')
-            where_parts.append(clean_xd)
+        if xd_predicate:
+            where_parts.append(xd_predicate)
 
         # Add filter WHERE conditions (for maintainedBy, approach, validGeometry)
         if filter_where:
             where_parts.append(filter_where)
 
         # Add time filter if present
-        if time_filter:
-            clean_time = time_filter.strip()
-            if clean_time.startswith('AND '):
-                clean_time = clean_time[4:]
-            clean_time = clean_time.replace('TIME_15MIN', 't.TIME_15MIN')
-            where_parts.append(clean_time)
+        if time_predicate:
+            where_parts.append(time_predicate)
 
         where_clause = " AND ".join(where_parts)
 
@@ -337,10 +296,9 @@ def get_anomaly_aggregated():
             legend_entity_filter = build_legend_filter(
                 legend_field=legend_field,
                 max_entities=MAX_ANOMALY_LEGEND_ENTITIES,
-                xd_filter=xd_filter,
+                xd_predicate=xd_predicate,
                 start_date=start_date_str,
                 end_date=end_date_str,
-                time_filter=time_filter,
                 dow_join=dow_filter
             )
             where_clause += legend_entity_filter
@@ -354,9 +312,7 @@ def get_anomaly_aggregated():
         {group_by_clause}
         """
 
-        arrow_data = session.sql(query).to_arrow()
-        arrow_bytes = snowflake_result_to_arrow(arrow_data)
-        return create_arrow_response(arrow_bytes)
+        return stream_cached_query(session, query)
 
     try:
         return handle_auth_error_retry(execute_query)
@@ -364,7 +320,7 @@ def get_anomaly_aggregated():
         print(f"[ERROR] /anomaly-aggregated: {e}")
         if is_auth_error(e):
             return "Database reconnecting - please wait", 503
-        return f"Error fetching aggregated anomaly data: {e}", 500
+        return "Error fetching aggregated anomaly data", 500
 
 
 @anomalies_bp.route('/anomaly-by-time-of-day', methods=['GET', 'POST'])
@@ -393,7 +349,7 @@ def get_anomaly_by_time_of_day():
     dow_filter = build_day_of_week_filter(day_of_week)
 
     # Build time-of-day filter
-    time_filter = build_time_of_day_filter(start_hour, start_minute, end_hour, end_minute)
+    time_predicate = build_time_of_day_predicate(start_hour, start_minute, end_hour, end_minute)
 
     def execute_query():
         session = get_snowflake_session(retry=True, max_retries=2)
@@ -404,7 +360,7 @@ def get_anomaly_by_time_of_day():
         if xd_segments:
             # Map interaction - use direct XD list (small, efficient)
             xd_values = [int(xd) for xd in xd_segments]
-            xd_filter = build_xd_filter(xd_values)
+            xd_predicate = build_xd_predicate(xd_values)
             filter_join = ""
             filter_where = ""
         elif signal_ids or maintained_by != 'all' or approach or (valid_geometry and valid_geometry != 'all'):
@@ -412,10 +368,10 @@ def get_anomaly_by_time_of_day():
             filter_join, filter_where = build_filter_joins_and_where(
                 signal_ids, maintained_by, approach, valid_geometry
             )
-            xd_filter = ""  # No XD list needed - filtering via joins
+            xd_predicate = ""
         else:
             # NO filters - query all
-            xd_filter = ""
+            xd_predicate = ""
             filter_join = ""
             filter_where = ""
 
@@ -435,24 +391,16 @@ def get_anomaly_by_time_of_day():
         where_parts.append("t.PREDICTION IS NOT NULL")
 
         # Add XD filter if present (for map interactions with xd_segments)
-        if xd_filter:
-            clean_xd = xd_filter.strip()
-            if clean_xd.startswith('AND '):
-                clean_xd = clean_xd[4:]
-            clean_xd = clean_xd.replace('XD', 't.XD')
-            where_parts.append(clean_xd)
+        if xd_predicate:
+            where_parts.append(xd_predicate)
 
         # Add filter WHERE conditions (for maintainedBy, approach, validGeometry)
         if filter_where:
             where_parts.append(filter_where)
 
         # Add time filter if present
-        if time_filter:
-            clean_time = time_filter.strip()
-            if clean_time.startswith('AND '):
-                clean_time = clean_time[4:]
-            clean_time = clean_time.replace('TIME_15MIN', 't.TIME_15MIN')
-            where_parts.append(clean_time)
+        if time_predicate:
+            where_parts.append(time_predicate)
 
         where_clause = " AND ".join(where_parts)
 
@@ -472,10 +420,9 @@ def get_anomaly_by_time_of_day():
             legend_entity_filter = build_legend_filter(
                 legend_field=legend_field,
                 max_entities=MAX_ANOMALY_LEGEND_ENTITIES,
-                xd_filter=xd_filter,
+                xd_predicate=xd_predicate,
                 start_date=start_date_str,
                 end_date=end_date_str,
-                time_filter=time_filter,
                 dow_join=dow_filter
             )
             where_clause += legend_entity_filter
@@ -489,8 +436,7 @@ def get_anomaly_by_time_of_day():
         {group_by_clause}
         """
 
-        arrow_data = session.sql(query).to_arrow()
-        arrow_bytes = snowflake_result_to_arrow(arrow_data)
+        arrow_bytes = cached_query_to_ipc(session, query)
         return create_arrow_response(arrow_bytes)
 
     try:
@@ -499,7 +445,7 @@ def get_anomaly_by_time_of_day():
         print(f"[ERROR] /anomaly-by-time-of-day: {e}")
         if is_auth_error(e):
             return "Database reconnecting - please wait", 503
-        return f"Error fetching time-of-day anomaly data: {e}", 500
+        return "Error fetching time-of-day anomaly data", 500
 
 
 @anomalies_bp.route('/anomaly-percent-aggregated', methods=['GET', 'POST'])
@@ -528,7 +474,7 @@ def get_anomaly_percent_aggregated():
     agg_level = get_aggregation_level(start_date_str, end_date_str)
 
     # Build time-of-day filter
-    time_filter = build_time_of_day_filter(start_hour, start_minute, end_hour, end_minute)
+    time_predicate = build_time_of_day_predicate(start_hour, start_minute, end_hour, end_minute)
 
     # Build day-of-week filter
     dow_filter = build_day_of_week_filter(day_of_week)
@@ -542,7 +488,7 @@ def get_anomaly_percent_aggregated():
         if xd_segments:
             # Map interaction - use direct XD list (small, efficient)
             xd_values = [int(xd) for xd in xd_segments]
-            xd_filter = build_xd_filter(xd_values)
+            xd_predicate = build_xd_predicate(xd_values)
             filter_join = ""
             filter_where = ""
         elif signal_ids or maintained_by != 'all' or approach or (valid_geometry and valid_geometry != 'all'):
@@ -550,10 +496,10 @@ def get_anomaly_percent_aggregated():
             filter_join, filter_where = build_filter_joins_and_where(
                 signal_ids, maintained_by, approach, valid_geometry
             )
-            xd_filter = ""  # No XD list needed - filtering via joins
+            xd_predicate = ""
         else:
             # NO filters - query all
-            xd_filter = ""
+            xd_predicate = ""
             filter_join = ""
             filter_where = ""
 
@@ -584,24 +530,16 @@ def get_anomaly_percent_aggregated():
         where_parts = [f"t.DATE_ONLY BETWEEN '{start_date_str}' AND '{end_date_str}'"]
 
         # Add XD filter if present (for map interactions with xd_segments)
-        if xd_filter:
-            clean_xd = xd_filter.strip()
-            if clean_xd.startswith('AND '):
-                clean_xd = clean_xd[4:]
-            clean_xd = clean_xd.replace('XD', 't.XD')
-            where_parts.append(clean_xd)
+        if xd_predicate:
+            where_parts.append(xd_predicate)
 
         # Add filter WHERE conditions (for maintainedBy, approach, validGeometry)
         if filter_where:
             where_parts.append(filter_where)
 
         # Add time filter if present
-        if time_filter:
-            clean_time = time_filter.strip()
-            if clean_time.startswith('AND '):
-                clean_time = clean_time[4:]
-            clean_time = clean_time.replace('TIME_15MIN', 't.TIME_15MIN')
-            where_parts.append(clean_time)
+        if time_predicate:
+            where_parts.append(time_predicate)
 
         where_clause = " AND ".join(where_parts)
 
@@ -621,10 +559,9 @@ def get_anomaly_percent_aggregated():
             legend_entity_filter = build_legend_filter(
                 legend_field=legend_field,
                 max_entities=MAX_ANOMALY_LEGEND_ENTITIES,
-                xd_filter=xd_filter,
+                xd_predicate=xd_predicate,
                 start_date=start_date_str,
                 end_date=end_date_str,
-                time_filter=time_filter,
                 dow_join=dow_filter
             )
             where_clause += legend_entity_filter
@@ -638,9 +575,7 @@ def get_anomaly_percent_aggregated():
         {group_by_clause}
         """
 
-        arrow_data = session.sql(query).to_arrow()
-        arrow_bytes = snowflake_result_to_arrow(arrow_data)
-        return create_arrow_response(arrow_bytes)
+        return stream_cached_query(session, query)
 
     try:
         return handle_auth_error_retry(execute_query)
@@ -648,7 +583,7 @@ def get_anomaly_percent_aggregated():
         print(f"[ERROR] /anomaly-percent-aggregated: {e}")
         if is_auth_error(e):
             return "Database reconnecting - please wait", 503
-        return f"Error fetching anomaly percent aggregated data: {e}", 500
+        return "Error fetching anomaly percent aggregated data", 500
 
 
 @anomalies_bp.route('/anomaly-percent-by-time-of-day', methods=['GET', 'POST'])
@@ -677,7 +612,7 @@ def get_anomaly_percent_by_time_of_day():
     dow_filter = build_day_of_week_filter(day_of_week)
 
     # Build time-of-day filter
-    time_filter = build_time_of_day_filter(start_hour, start_minute, end_hour, end_minute)
+    time_predicate = build_time_of_day_predicate(start_hour, start_minute, end_hour, end_minute)
 
     def execute_query():
         session = get_snowflake_session(retry=True, max_retries=2)
@@ -688,7 +623,7 @@ def get_anomaly_percent_by_time_of_day():
         if xd_segments:
             # Map interaction - use direct XD list (small, efficient)
             xd_values = [int(xd) for xd in xd_segments]
-            xd_filter = build_xd_filter(xd_values)
+            xd_predicate = build_xd_predicate(xd_values)
             filter_join = ""
             filter_where = ""
         elif signal_ids or maintained_by != 'all' or approach or (valid_geometry and valid_geometry != 'all'):
@@ -696,10 +631,10 @@ def get_anomaly_percent_by_time_of_day():
             filter_join, filter_where = build_filter_joins_and_where(
                 signal_ids, maintained_by, approach, valid_geometry
             )
-            xd_filter = ""  # No XD list needed - filtering via joins
+            xd_predicate = ""
         else:
             # NO filters - query all
-            xd_filter = ""
+            xd_predicate = ""
             filter_join = ""
             filter_where = ""
 
@@ -719,24 +654,16 @@ def get_anomaly_percent_by_time_of_day():
         where_parts = [f"t.DATE_ONLY BETWEEN '{start_date_str}' AND '{end_date_str}'"]
 
         # Add XD filter if present (for map interactions with xd_segments)
-        if xd_filter:
-            clean_xd = xd_filter.strip()
-            if clean_xd.startswith('AND '):
-                clean_xd = clean_xd[4:]
-            clean_xd = clean_xd.replace('XD', 't.XD')
-            where_parts.append(clean_xd)
+        if xd_predicate:
+            where_parts.append(xd_predicate)
 
         # Add filter WHERE conditions (for maintainedBy, approach, validGeometry)
         if filter_where:
             where_parts.append(filter_where)
 
         # Add time filter if present
-        if time_filter:
-            clean_time = time_filter.strip()
-            if clean_time.startswith('AND '):
-                clean_time = clean_time[4:]
-            clean_time = clean_time.replace('TIME_15MIN', 't.TIME_15MIN')
-            where_parts.append(clean_time)
+        if time_predicate:
+            where_parts.append(time_predicate)
 
         where_clause = " AND ".join(where_parts)
 
@@ -756,10 +683,9 @@ def get_anomaly_percent_by_time_of_day():
             legend_entity_filter = build_legend_filter(
                 legend_field=legend_field,
                 max_entities=MAX_ANOMALY_LEGEND_ENTITIES,
-                xd_filter=xd_filter,
+                xd_predicate=xd_predicate,
                 start_date=start_date_str,
                 end_date=end_date_str,
-                time_filter=time_filter,
                 dow_join=dow_filter
             )
             where_clause += legend_entity_filter
@@ -773,8 +699,7 @@ def get_anomaly_percent_by_time_of_day():
         {group_by_clause}
         """
 
-        arrow_data = session.sql(query).to_arrow()
-        arrow_bytes = snowflake_result_to_arrow(arrow_data)
+        arrow_bytes = cached_query_to_ipc(session, query)
         return create_arrow_response(arrow_bytes)
 
     try:
@@ -783,7 +708,7 @@ def get_anomaly_percent_by_time_of_day():
         print(f"[ERROR] /anomaly-percent-by-time-of-day: {e}")
         if is_auth_error(e):
             return "Database reconnecting - please wait", 503
-        return f"Error fetching time-of-day anomaly percent data: {e}", 500
+        return "Error fetching time-of-day anomaly percent data", 500
 
 
 @anomalies_bp.route('/monitoring-anomalies', methods=['GET', 'POST'])
@@ -826,6 +751,9 @@ def get_monitoring_anomalies():
     }
 
     def execute_query():
+        # Imported on first use: report_service pulls in matplotlib and fpdf
+        from services.report_service import fetch_monitoring_anomaly_rows
+
         rows, threshold = fetch_monitoring_anomaly_rows(filters)
         payload = []
         target_date_value = None
@@ -870,7 +798,7 @@ def get_monitoring_anomalies():
         print(f"[ERROR] /monitoring-anomalies: {exc}")
         if is_auth_error(exc):
             return "Database reconnecting - please wait", 503
-        return f"Error fetching monitoring anomalies: {exc}", 500
+        return "Error fetching monitoring anomalies", 500
 
 
 @anomalies_bp.route('/travel-time-data', methods=['GET', 'POST'])
@@ -890,112 +818,77 @@ def get_travel_time_data():
     start_date_str = normalize_date(start_date)
     end_date_str = normalize_date(end_date)
 
+    # The result is post-processed after the query, so key the cache on the inputs
+    cache_key = (
+        'travel-time-data', start_date_str, end_date_str, tuple(sorted(set(xd_segments or ()))),
+        tuple(sorted(set(signal_ids or ()))), maintained_by, approach, valid_geometry, remove_anomalies
+    )
+
     def execute_query():
+        cached = result_cache.get(cache_key)
+        if cached is not None:
+            return create_arrow_response(cached)
+
         session = get_snowflake_session(retry=True, max_retries=2)
         if not session:
             raise Exception("Unable to establish database connection")
-        # Resolve XD segments
-        if xd_segments:
-            # Map interaction - use direct XD list
-            xd_values = [int(xd) for xd in xd_segments]
-        elif signal_ids or maintained_by != 'all':
-            # Filter panel - use join-based filtering
-            xd_values = build_xd_filter_with_joins(
-                session, signal_ids, maintained_by, approach, valid_geometry
-            )
-            if not xd_values:
-                arrow_bytes = create_empty_arrow_response('travel_time_detail')
-                return create_arrow_response(arrow_bytes)
-        else:
-            xd_values = None
 
-        # Step 1: Query DIM_SIGNALS_XD to get signal info for the XD values
+        # Dimension rows for the requested XDs, one per XD so the join below
+        # can't duplicate analytics rows when an XD belongs to several signals
         dim_query = build_xd_dimension_query(signal_ids, approach, valid_geometry)
-
-        # Add XD filter if we have specific XDs
-        if xd_values:
-            xd_str = ', '.join(map(str, xd_values))
-            dim_query += f" AND XD IN ({xd_str})"
-
-        dim_result = session.sql(dim_query).collect()
-
-        if not dim_result:
-            arrow_bytes = create_empty_arrow_response('travel_time_detail')
-            return create_arrow_response(arrow_bytes)
-
-        # Extract XD values and create mapping
-        xd_to_signal = create_xd_lookup_dict(dim_result)
-        xd_values = list(xd_to_signal.keys())
-
-        if not xd_values:
-            arrow_bytes = create_empty_arrow_response('travel_time_detail')
-            return create_arrow_response(arrow_bytes)
-
-        # Step 2: Query TRAVEL_TIME_ANALYTICS using XD values
-        xd_filter = build_xd_filter(xd_values)
+        if xd_segments:
+            # Map interaction - use direct XD list
+            dim_query += build_xd_filter([int(xd) for xd in xd_segments])
+        elif maintained_by in ('odot', 'others'):
+            maintained = 'TRUE' if maintained_by == 'odot' else 'FALSE'
+            dim_query += f"""
+            AND XD IN (
+                SELECT x.XD FROM DIM_SIGNALS_XD x
+                INNER JOIN DIM_SIGNALS s ON x.ID = s.ID
+                WHERE s.ODOT_MAINTAINED = {maintained}
+            )"""
+        dim_query += " QUALIFY ROW_NUMBER() OVER (PARTITION BY XD ORDER BY ID) = 1"
+
+        # One round trip: Snowflake joins the signal info onto each analytics row
         query = f"""
+        WITH dim AS ({dim_query})
         SELECT
-            XD,
-            TIMESTAMP,
-            TRAVEL_TIME_SECONDS,
-            PREDICTION,
-            ANOMALY,
-            ORIGINATED_ANOMALY
-        FROM TRAVEL_TIME_ANALYTICS
-        WHERE TIMESTAMP >= '{start_date_str}'
-        AND TIMESTAMP <= '{end_date_str}'
-        {xd_filter}
-        {"AND ANOMALY = FALSE" if remove_anomalies else ""}
-        ORDER BY TIMESTAMP
+            t.XD,
+            t.TIMESTAMP,
+            t.TRAVEL_TIME_SECONDS,
+            t.PREDICTION,
+            t.ANOMALY,
+            t.ORIGINATED_ANOMALY,
+            d.ID,
+            d.LATITUDE,
+            d.LONGITUDE,
+            d.APPROACH,
+            d.VALID_GEOMETRY
+        FROM TRAVEL_TIME_ANALYTICS t
+        INNER JOIN dim d ON t.XD = d.XD
+        WHERE t.TIMESTAMP >= '{start_date_str}'
+        AND t.TIMESTAMP <= '{end_date_str}'
+        {"AND t.ANOMALY = FALSE" if remove_anomalies else ""}
+        ORDER BY t.TIMESTAMP
         """
 
-        analytics_result = session.sql(query).collect()
-
-        # Step 3: Combine results - join analytics with signal info
-        xds = []
-        timestamps = []
-        travel_times = []
-        predictions = []
-        anomalies = []
-        originated_anomalies = []
-        ids = []
-        latitudes = []
-        longitudes = []
-        approaches = []
-        valid_geometries = []
-
-        for row in analytics_result:
-            analytics_dict = row.as_dict()
-            xd = analytics_dict['XD']
-            signal_info = xd_to_signal.get(xd, {})
-
-            xds.append(xd)
-            timestamps.append(analytics_dict['TIMESTAMP'])
-            travel_times.append(analytics_dict['TRAVEL_TIME_SECONDS'])
-            predictions.append(analytics_dict.get('PREDICTION'))
-            anomalies.append(analytics_dict.get('ANOMALY'))
-            originated_anomalies.append(analytics_dict.get('ORIGINATED_ANOMALY'))
-            ids.append(signal_info.get('ID'))
-            latitudes.append(signal_info.get('LATITUDE'))
-            longitudes.append(signal_info.get('LONGITUDE'))
-            approaches.append(signal_info.get('APPROACH'))
-            valid_geometries.append(signal_info.get('VALID_GEOMETRY'))
-
-        result_table = pa.table({
-            'XD': xds,
-            'TIMESTAMP': timestamps,
-            'TRAVEL_TIME_SECONDS': travel_times,
-            'PREDICTION': predictions,
-            'ANOMALY': anomalies,
-            'ORIGINATED_ANOMALY': originated_anomalies,
-            'ID': ids,
-            'LATITUDE': latitudes,
-            'LONGITUDE': longitudes,
-            'APPROACH': approaches,
-            'VALID_GEOMETRY': valid_geometries
-        })
+        result_table = session.sql(query).to_arrow()
+        if result_table.num_rows == 0:
+            arrow_bytes = create_empty_arrow_response('travel_time_detail')
+            return create_arrow_response(arrow_bytes)
+
+        result_table = result_table.set_column(
+            0, 'XD', result_table.column('XD').cast(pa.int64())
+        )
+        # Every row repeats its segment's signal ID; send each distinct ID
+        # once as a dictionary and int32 indices per row
+        id_index = result_table.schema.get_field_index('ID')
+        result_table = result_table.set_column(
+            id_index, 'ID', result_table.column(id_index).combine_chunks().dictionary_encode()
+        )
 
         arrow_bytes = serialize_arrow_to_ipc(result_table)
+        result_cache.set(cache_key, arrow_bytes)
         return create_arrow_response(arrow_bytes)
 
     try:
@@ -1004,4 +897,4 @@ def get_travel_time_data():
         print(f"[ERROR] /travel-time-data: {e}")
         if is_auth_error(e):
             return "Database reconnecting - please wait", 503
-        return f"Error fetching travel time data: {e}", 500
+        return "Error fetching travel time data", 500
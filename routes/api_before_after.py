@@ -8,16 +8,16 @@ from flask import Blueprint, request
 
 from config import DEBUG_BACKEND_TIMING, MAX_LEGEND_ENTITIES, MAX_BEFORE_AFTER_LEGEND_ENTITIES, MAX_BEFORE_AFTER_SMALL_MULTIPLES_ENTITIES
 from database import get_snowflake_session, is_auth_error
-from utils.arrow_utils import create_arrow_response, snowflake_result_to_arrow
+from utils.arrow_utils import create_arrow_response, snowflake_result_to_arrow, stream_cached_query
 from utils.error_handler import handle_auth_error_retry
 from utils.query_utils import (
     normalize_date,
     build_filter_joins_and_where,
-    build_time_of_day_filter,
+    build_time_of_day_predicate,
     build_day_of_week_filter,
     build_legend_join,
     build_legend_filter,
-    build_xd_filter
+    build_xd_predicate
 )
 
 before_after_bp = Blueprint('before_after', __name__)
@@ -51,7 +51,7 @@ def get_before_after_summary():
     after_end_str = normalize_date(after_end)
 
     # Build time-of-day filter
-    time_filter = build_time_of_day_filter(start_hour, start_minute, end_hour, end_minute)
+    time_predicate = build_time_of_day_predicate(start_hour, start_minute, end_hour, end_minute)
 
     # Build day-of-week filter
     dow_filter = build_day_of_week_filter(day_of_week)
@@ -77,12 +77,8 @@ def get_before_after_summary():
             where_parts = [f"t.DATE_ONLY BETWEEN '{start_date}' AND '{end_date}'"]
             if filter_where:
                 where_parts.append(filter_where)
-            if time_filter:
-                clean_time = time_filter.strip()
-                if clean_time.startswith('AND '):
-                    clean_time = clean_time[4:]
-                clean_time = clean_time.replace('TIME_15MIN', 't.TIME_15MIN')
-                where_parts.append(clean_time)
+            if time_predicate:
+                where_parts.append(time_predicate)
             if remove_anomalies:
                 where_parts.append("t.ANOMALY = FALSE")
             return " AND ".join(where_parts)
@@ -177,7 +173,7 @@ def get_before_after_summary_xd():
     after_end_str = normalize_date(after_end)
 
     # Build time-of-day filter
-    time_filter = build_time_of_day_filter(start_hour, start_minute, end_hour, end_minute)
+    time_predicate = build_time_of_day_predicate(start_hour, start_minute, end_hour, end_minute)
 
     # Build day-of-week filter
     dow_filter = build_day_of_week_filter(day_of_week)
@@ -202,12 +198,8 @@ def get_before_after_summary_xd():
             where_parts = [f"t.DATE_ONLY BETWEEN '{start_date}' AND '{end_date}'"]
             if filter_where:
                 where_parts.append(filter_where)
-            if time_filter:
-                clean_time = time_filter.strip()
-                if clean_time.startswith('AND '):
-                    clean_time = clean_time[4:]
-                clean_time = clean_time.replace('TIME_15MIN', 't.TIME_15MIN')
-                where_parts.append(clean_time)
+            if time_predicate:
+                where_parts.append(time_predicate)
             if remove_anomalies:
                 where_parts.append("t.ANOMALY = FALSE")
             return " AND ".join(where_parts)
@@ -305,7 +297,7 @@ def get_before_after_aggregated():
     after_end_str = normalize_date(after_end)
 
     # Build time-of-day filter
-    time_filter = build_time_of_day_filter(start_hour, start_minute, end_hour, end_minute)
+    time_predicate = build_time_of_day_predicate(start_hour, start_minute, end_hour, end_minute)
 
     # Build day-of-week filter
     dow_filter = build_day_of_week_filter(day_of_week)
@@ -323,7 +315,7 @@ def get_before_after_aggregated():
         if xd_segments:
             # Map interaction - use direct XD list
             xd_values = [int(xd) for xd in xd_segments]
-            xd_filter = build_xd_filter(xd_values)
+            xd_predicate = build_xd_predicate(xd_values)
             filter_join = ""
             filter_where = ""
         elif signal_ids or maintained_by != 'all' or approach or (valid_geometry and valid_geometry != 'all'):
@@ -331,10 +323,10 @@ def get_before_after_aggregated():
             filter_join, filter_where = build_filter_joins_and_where(
                 signal_ids, maintained_by, approach, valid_geometry
             )
-            xd_filter = ""
+            xd_predicate = ""
         else:
             # NO filters - query all
-            xd_filter = ""
+            xd_predicate = ""
             filter_join = ""
             filter_where = ""
 
@@ -346,20 +338,12 @@ def get_before_after_aggregated():
         # Build WHERE clause parts (shared between before and after)
         def build_where_clause(start_date, end_date):
             where_parts = [f"t.DATE_ONLY BETWEEN '{start_date}' AND '{end_date}'"]
-            if xd_filter:
-                clean_xd = xd_filter.strip()
-                if clean_xd.startswith('AND '):
-                    clean_xd = clean_xd[4:]
-                clean_xd = clean_xd.replace('XD', 't.XD')
-                where_parts.append(clean_xd)
+            if xd_predicate:
+                where_parts.append(xd_predicate)
             if filter_where:
                 where_parts.append(filter_where)
-            if time_filter:
-                clean_time = time_filter.strip()
-                if clean_time.startswith('AND '):
-                    clean_time = clean_time[4:]
-                clean_time = clean_time.replace('TIME_15MIN', 't.TIME_15MIN')
-                where_parts.append(clean_time)
+            if time_predicate:
+                where_parts.append(time_predicate)
             if remove_anomalies:
                 where_parts.append("t.ANOMALY = FALSE")
             return " AND ".join(where_parts)
@@ -372,10 +356,9 @@ def get_before_after_aggregated():
             legend_entity_filter = build_legend_filter(
                 legend_field=legend_field,
                 max_entities=legend_limit,
-                xd_filter=xd_filter,
+                xd_predicate=xd_predicate,
                 start_date=before_start_str,  # Use before period for entity selection
                 end_date=before_end_str,
-                time_filter=time_filter,
                 dow_join=dow_filter
             )
             before_where += legend_entity_filter
@@ -422,17 +405,14 @@ def get_before_after_aggregated():
         if DEBUG_BACKEND_TIMING:
             print(f"  [QUERY]:\n{query}\n")
 
-        arrow_data = session.sql(query).to_arrow()
+        response = stream_cached_query(session, query)
         query_time = (time.time() - query_start) * 1000
 
-        arrow_bytes = snowflake_result_to_arrow(arrow_data)
-        total_time = (time.time() - request_start) * 1000
-
         if DEBUG_BACKEND_TIMING:
-            print(f"  [1] Before/After aggregated query: {query_time:.2f}ms ({arrow_data.num_rows} rows)")
-            print(f"  [TOTAL] /before-after-aggregated: {total_time:.2f}ms\n")
+            print(f"  [1] Before/After aggregated query: {query_time:.2f}ms (first chunk)")
+            print(f"  [TOTAL] /before-after-aggregated: {(time.time() - request_start) * 1000:.2f}ms to first chunk\n")
 
-        return create_arrow_response(arrow_bytes)
+        return response
 
     try:
         return handle_auth_error_retry(execute_query)
@@ -480,7 +460,7 @@ def get_before_after_by_time_of_day():
     dow_filter = build_day_of_week_filter(day_of_week)
 
     # Build time-of-day filter
-    time_filter = build_time_of_day_filter(start_hour, start_minute, end_hour, end_minute)
+    time_predicate = build_time_of_day_predicate(start_hour, start_minute, end_hour, end_minute)
 
     if DEBUG_BACKEND_TIMING:
         print(f"\n[TIMING] /before-after-by-time-of-day START")
@@ -493,16 +473,16 @@ def get_before_after_by_time_of_day():
         # Determine filtering strategy
         if xd_segments:
             xd_values = [int(xd) for xd in xd_segments]
-            xd_filter = build_xd_filter(xd_values)
+            xd_predicate = build_xd_predicate(xd_values)
             filter_join = ""
             filter_where = ""
         elif signal_ids or maintained_by != 'all' or approach or (valid_geometry and valid_geometry != 'all'):
             filter_join, filter_where = build_filter_joins_and_where(
                 signal_ids, maintained_by, approach, valid_geometry
             )
-            xd_filter = ""
+            xd_predicate = ""
         else:
-            xd_filter = ""
+            xd_predicate = ""
             filter_join = ""
             filter_where = ""
 
@@ -514,20 +494,12 @@ def get_before_after_by_time_of_day():
         # Build WHERE clause parts (shared between before and after)
         def build_where_clause(start_date, end_date):
             where_parts = [f"t.DATE_ONLY BETWEEN '{start_date}' AND '{end_date}'"]
-            if xd_filter:
-                clean_xd = xd_filter.strip()
-                if clean_xd.startswith('AND '):
-                    clean_xd = clean_xd[4:]
-                clean_xd = clean_xd.replace('XD', 't.XD')
-                where_parts.append(clean_xd)
+            if xd_predicate:
+                where_parts.append(xd_predicate)
             if filter_where:
                 where_parts.append(filter_where)
-            if time_filter:
-                clean_time = time_filter.strip()
-                if clean_time.startswith('AND '):
-                    clean_time = clean_time[4:]
-                clean_time = clean_time.replace('TIME_15MIN', 't.TIME_15MIN')
-                where_parts.append(clean_time)
+            if time_predicate:
+                where_parts.append(time_predicate)
             if remove_anomalies:
                 where_parts.append("t.ANOMALY = FALSE")
             return " AND ".join(where_parts)
@@ -540,10 +512,9 @@ def get_before_after_by_time_of_day():
             legend_entity_filter = build_legend_filter(
                 legend_field=legend_field,
                 max_entities=legend_limit,
-                xd_filter=xd_filter,
+                xd_predicate=xd_predicate,
                 start_date=before_start_str,  # Use before period for entity selection
                 end_date=before_end_str,
-                time_filter=time_filter,
                 dow_join=dow_filter
             )
             before_where += legend_entity_filter
@@ -8,7 +8,7 @@ from typing import Any, Dict, Iterable, Optional, Sequence
 
 from flask import Blueprint, jsonify, request
 
-from services import report_service, subscription_store
+from services import subscription_store
 from routes.api_auth import SESSION_COOKIE_NAME  # reuse the same cookie name
 
 subscriptions_bp = Blueprint("subscriptions", __name__)
@@ -186,6 +186,9 @@ def send_test_report():
 
     effective_settings = saved_settings
 
+    # Imported on first use: report_service pulls in matplotlib and fpdf
+    from services import report_service
+
     result = report_service.generate_and_send_report(
         email,
         effective_settings,
@@ -3,29 +3,23 @@ Travel Time API Routes - Returns Arrow data directly
 Optimized for low-latency small queries
 """
 
-import json
 import time
-import pyarrow as pa
-from flask import Blueprint, request, jsonify
+from flask import Blueprint
 
 from config import DEBUG_BACKEND_TIMING, DEBUG_DISABLE_SERVER_CACHE, MAX_LEGEND_ENTITIES
 from database import get_snowflake_session, is_auth_error
 from utils.arrow_utils import (
-    serialize_arrow_to_ipc,
-    create_empty_arrow_response,
     create_arrow_response,
-    snowflake_result_to_arrow
+    snowflake_result_to_arrow,
+    cached_query_to_ipc,
+    stream_snowflake_result
 )
 from utils.error_handler import handle_auth_error_retry
 from utils.query_utils import (
     normalize_date,
-    build_xd_dimension_query,
-    extract_xd_values,
-    build_xd_filter,
-    build_xd_filter_with_joins,
+    build_xd_predicate,
     build_filter_joins_and_where,
-    create_xd_lookup_dict,
-    build_time_of_day_filter,
+    build_time_of_day_predicate,
     build_day_of_week_filter,
     get_aggregation_level,
     build_legend_join,
@@ -62,9 +56,7 @@ def get_signals():
         session = get_snowflake_session(retry=True, max_retries=2)
         if not session:
             raise Exception("Unable to establish database connection")
-        arrow_data = session.sql(query).to_arrow()
-        arrow_bytes = snowflake_result_to_arrow(arrow_data)
-        return create_arrow_response(arrow_bytes)
+        return create_arrow_response(cached_query_to_ipc(session, query))
 
     try:
         return handle_auth_error_retry(execute_query)
@@ -77,7 +69,7 @@ def get_signals():
 
 @travel_time_bp.route('/dim-signals')
 def get_dim_signals():
-    """Get DIM_SIGNALS dimension data (for hierarchical filtering, cached on client)"""
+    """Get DIM_SIGNALS dimension data (for hierarchical filtering, cached on client and server)"""
     query = """
     SELECT
         ID,
@@ -94,9 +86,7 @@ def get_dim_signals():
         session = get_snowflake_session(retry=True, max_retries=2)
         if not session:
             raise Exception("Unable to establish database connection")
-        arrow_data = session.sql(query).to_arrow()
-        arrow_bytes = snowflake_result_to_arrow(arrow_data)
-        return create_arrow_response(arrow_bytes)
+        return create_arrow_response(cached_query_to_ipc(session, query))
 
     try:
         return handle_auth_error_retry(execute_query)
@@ -109,7 +99,7 @@ def get_dim_signals():
 
 @travel_time_bp.route('/dim-signals-xd')
 def get_dim_signals_xd():
-    """Get DIM_SIGNALS_XD dimension data (XD segment attributes, cached on client)"""
+    """Get DIM_SIGNALS_XD dimension data (XD segment attributes, cached on client and server)"""
     query = """
     SELECT
         XD,
@@ -128,9 +118,7 @@ def get_dim_signals_xd():
         session = get_snowflake_session(retry=True, max_retries=2)
         if not session:
             raise Exception("Unable to establish database connection")
-        arrow_data = session.sql(query).to_arrow()
-        arrow_bytes = snowflake_result_to_arrow(arrow_data)
-        return create_arrow_response(arrow_bytes)
+        return create_arrow_response(cached_query_to_ipc(session, query))
 
     try:
         return handle_auth_error_retry(execute_query)
@@ -226,7 +214,7 @@ def get_travel_time_summary():
     end_date_str = normalize_date(end_date)
 
     # Build time-of-day filter
-    time_filter = build_time_of_day_filter(start_hour, start_minute, end_hour, end_minute)
+    time_predicate = build_time_of_day_predicate(start_hour, start_minute, end_hour, end_minute)
 
     # Build day-of-week filter
     dow_filter = build_day_of_week_filter(day_of_week)
@@ -254,12 +242,8 @@ def get_travel_time_summary():
         if filter_where:
             where_parts.append(filter_where)
 
-        if time_filter:
-            clean_time = time_filter.strip()
-            if clean_time.startswith('AND '):
-                clean_time = clean_time[4:]
-            clean_time = clean_time.replace('TIME_15MIN', 't.TIME_15MIN')
-            where_parts.append(clean_time)
+        if time_predicate:
+            where_parts.append(time_predicate)
 
         if remove_anomalies:
             where_parts.append("t.ANOMALY = FALSE")
@@ -291,17 +275,14 @@ def get_travel_time_summary():
         if DEBUG_BACKEND_TIMING:
             print(f"  [QUERY]:\n{analytics_query}\n")
 
-        arrow_data = session.sql(analytics_query).to_arrow()
+        response = stream_snowflake_result(session.sql(analytics_query))
         query_time = (time.time() - query_start) * 1000
 
-        arrow_bytes = snowflake_result_to_arrow(arrow_data)
-        total_time = (time.time() - request_start) * 1000
-
         if DEBUG_BACKEND_TIMING:
-            print(f"  [1] Single efficient query: {query_time:.2f}ms ({arrow_data.num_rows} rows)")
-            print(f"  [TOTAL] /travel-time-summary: {total_time:.2f}ms\n")
+            print(f"  [1] Single efficient query: {query_time:.2f}ms (first chunk)")
+            print(f"  [TOTAL] /travel-time-summary: {(time.time() - request_start) * 1000:.2f}ms to first chunk\n")
 
-        return create_arrow_response(arrow_bytes)
+        return response
 
     try:
         return handle_auth_error_retry(execute_query)
@@ -336,7 +317,7 @@ def get_travel_time_summary_xd():
     end_date_str = normalize_date(end_date)
 
     # Build time-of-day filter
-    time_filter = build_time_of_day_filter(start_hour, start_minute, end_hour, end_minute)
+    time_predicate = build_time_of_day_predicate(start_hour, start_minute, end_hour, end_minute)
 
     # Build day-of-week filter
     dow_filter = build_day_of_week_filter(day_of_week)
@@ -364,12 +345,8 @@ def get_travel_time_summary_xd():
         if filter_where:
             where_parts.append(filter_where)
 
-        if time_filter:
-            clean_time = time_filter.strip()
-            if clean_time.startswith('AND '):
-                clean_time = clean_time[4:]
-            clean_time = clean_time.replace('TIME_15MIN', 't.TIME_15MIN')
-            where_parts.append(clean_time)
+        if time_predicate:
+            where_parts.append(time_predicate)
 
         if remove_anomalies:
             where_parts.append("t.ANOMALY = FALSE")
@@ -401,17 +378,14 @@ def get_travel_time_summary_xd():
         if DEBUG_BACKEND_TIMING:
             print(f"  [QUERY]:\n{analytics_query}\n")
 
-        arrow_data = session.sql(analytics_query).to_arrow()
+        response = stream_snowflake_result(session.sql(analytics_query))
         query_time = (time.time() - query_start) * 1000
 
-        arrow_bytes = snowflake_result_to_arrow(arrow_data)
-        total_time = (time.time() - request_start) * 1000
-
         if DEBUG_BACKEND_TIMING:
-            print(f"  [1] Single efficient query: {query_time:.2f}ms ({arrow_data.num_rows} rows)")
-            print(f"  [TOTAL] /travel-time-summary-xd: {total_time:.2f}ms\n")
+            print(f"  [1] Single efficient query: {query_time:.2f}ms (first chunk)")
+            print(f"  [TOTAL] /travel-time-summary-xd: {(time.time() - request_start) * 1000:.2f}ms to first chunk\n")
 
-        return create_arrow_response(arrow_bytes)
+        return response
 
     try:
         return handle_auth_error_retry(execute_query)
@@ -451,7 +425,7 @@ def get_travel_time_aggregated():
     agg_level = get_aggregation_level(start_date_str, end_date_str)
 
     # Build time-of-day filter
-    time_filter = build_time_of_day_filter(start_hour, start_minute, end_hour, end_minute)
+    time_predicate = build_time_of_day_predicate(start_hour, start_minute, end_hour, end_minute)
 
     # Build day-of-week filter
     dow_filter = build_day_of_week_filter(day_of_week)
@@ -468,7 +442,7 @@ def get_travel_time_aggregated():
         if xd_segments:
             # Map interaction - use direct XD list (small, efficient)
             xd_values = [int(xd) for xd in xd_segments]
-            xd_filter = build_xd_filter(xd_values)
+            xd_predicate = build_xd_predicate(xd_values)
             filter_join = ""
             filter_where = ""
             if DEBUG_BACKEND_TIMING:
@@ -480,12 +454,12 @@ def get_travel_time_aggregated():
             filter_join, filter_where = build_filter_joins_and_where(
                 signal_ids, maintained_by, approach, valid_geometry
             )
-            xd_filter = ""  # No XD list needed - filtering via joins
+            xd_predicate = ""
         else:
             # NO filters - query all
             if DEBUG_BACKEND_TIMING:
                 print(f"  [INFO] NO filters - querying ALL XDs")
-            xd_filter = ""
+            xd_predicate = ""
             filter_join = ""
             filter_where = ""
 
@@ -517,24 +491,16 @@ def get_travel_time_aggregated():
         where_parts = [f"t.DATE_ONLY BETWEEN '{start_date_str}' AND '{end_date_str}'"]
 
         # Add XD filter if present (for map interactions with xd_segments)
-        if xd_filter:
-            clean_xd = xd_filter.strip()
-            if clean_xd.startswith('AND '):
-                clean_xd = clean_xd[4:]  # Remove only leading "AND "
-            clean_xd = clean_xd.replace('XD', 't.XD')
-            where_parts.append(clean_xd)
+        if xd_predicate:
+            where_parts.append(xd_predicate)
 
         # Add filter WHERE conditions (for maintainedBy, approach, validGeometry)
         if filter_where:
             where_parts.append(filter_where)
 
         # Add time filter if present
-        if time_filter:
-            clean_time = time_filter.strip()
-            if clean_time.startswith('AND '):
-                clean_time = clean_time[4:]  # Remove only leading "AND "
-            clean_time = clean_time.replace('TIME_15MIN', 't.TIME_15MIN')
-            where_parts.append(clean_time)
+        if time_predicate:
+            where_parts.append(time_predicate)
 
         if remove_anomalies:
             where_parts.append("t.ANOMALY = FALSE")
@@ -558,10 +524,9 @@ def get_travel_time_aggregated():
             legend_entity_filter = build_legend_filter(
                 legend_field=legend_field,
                 max_entities=MAX_LEGEND_ENTITIES,
-                xd_filter=xd_filter,
+                xd_predicate=xd_predicate,
                 start_date=start_date_str,
                 end_date=end_date_str,
-                time_filter=time_filter,
                 dow_join=dow_filter
             )
             where_clause += legend_entity_filter
@@ -578,17 +543,14 @@ def get_travel_time_aggregated():
         if DEBUG_BACKEND_TIMING and legend_field:
             print(f"\n[LEGEND QUERY DEBUG]:\n{query}\n")
 
-        arrow_data = session.sql(query).to_arrow()
+        response = stream_snowflake_result(session.sql(query))
         query_time = (time.time() - query_start) * 1000
 
-        arrow_bytes = snowflake_result_to_arrow(arrow_data)
-        total_time = (time.time() - request_start) * 1000
-
         if DEBUG_BACKEND_TIMING:
-            print(f"  [2] Aggregated query ({agg_level}): {query_time:.2f}ms")
-            print(f"  [TOTAL] /travel-time-aggregated: {total_time:.2f}ms\n")
+            print(f"  [2] Aggregated query ({agg_level}): {query_time:.2f}ms (first chunk)")
+            print(f"  [TOTAL] /travel-time-aggregated: {(time.time() - request_start) * 1000:.2f}ms to first chunk\n")
 
-        return create_arrow_response(arrow_bytes)
+        return response
 
     try:
         return handle_auth_error_retry(execute_query)
@@ -628,7 +590,7 @@ def get_travel_time_by_time_of_day():
     dow_filter = build_day_of_week_filter(day_of_week)
 
     # Build time-of-day filter
-    time_filter = build_time_of_day_filter(start_hour, start_minute, end_hour, end_minute)
+    time_predicate = build_time_of_day_predicate(start_hour, start_minute, end_hour, end_minute)
 
     if DEBUG_BACKEND_TIMING:
         print(f"\n[TIMING] /travel-time-by-time-of-day START")
@@ -642,7 +604,7 @@ def get_travel_time_by_time_of_day():
         if xd_segments:
             # Map interaction - use direct XD list (small, efficient)
             xd_values = [int(xd) for xd in xd_segments]
-            xd_filter = build_xd_filter(xd_values)
+            xd_predicate = build_xd_predicate(xd_values)
             filter_join = ""
             filter_where = ""
             if DEBUG_BACKEND_TIMING:
@@ -654,12 +616,12 @@ def get_travel_time_by_time_of_day():
             filter_join, filter_where = build_filter_joins_and_where(
                 signal_ids, maintained_by, approach, valid_geometry
             )
-            xd_filter = ""  # No XD list needed - filtering via joins
+            xd_predicate = ""
         else:
             # NO filters - query all
             if DEBUG_BACKEND_TIMING:
                 print(f"  [INFO] NO filters - querying ALL XDs")
-            xd_filter = ""
+            xd_predicate = ""
             filter_join = ""
             filter_where = ""
 
@@ -681,24 +643,16 @@ def get_travel_time_by_time_of_day():
         where_parts = [f"t.DATE_ONLY BETWEEN '{start_date_str}' AND '{end_date_str}'"]
 
         # Add XD filter if present (for map interactions with xd_segments)
-        if xd_filter:
-            clean_xd = xd_filter.strip()
-            if clean_xd.startswith('AND '):
-                clean_xd = clean_xd[4:]  # Remove only leading "AND "
-            clean_xd = clean_xd.replace('XD', 't.XD')
-            where_parts.append(clean_xd)
+        if xd_predicate:
+            where_parts.append(xd_predicate)
 
         # Add filter WHERE conditions (for maintainedBy, approach, validGeometry)
         if filter_where:
             where_parts.append(filter_where)
 
         # Add time filter if present
-        if time_filter:
-            clean_time = time_filter.strip()
-            if clean_time.startswith('AND '):
-                clean_time = clean_time[4:]  # Remove only leading "AND "
-            clean_time = clean_time.replace('TIME_15MIN', 't.TIME_15MIN')
-            where_parts.append(clean_time)
+        if time_predicate:
+            where_parts.append(time_predicate)
 
         if remove_anomalies:
             where_parts.append("t.ANOMALY = FALSE")
@@ -722,10 +676,9 @@ def get_travel_time_by_time_of_day():
             legend_entity_filter = build_legend_filter(
                 legend_field=legend_field,
                 max_entities=MAX_LEGEND_ENTITIES,
-                xd_filter=xd_filter,
+                xd_predicate=xd_predicate,
                 start_date=start_date_str,
                 end_date=end_date_str,
-                time_filter=time_filter,
                 dow_join=dow_filter
             )
             where_clause += legend_entity_filter
@@ -742,17 +695,14 @@ def get_travel_time_by_time_of_day():
         if DEBUG_BACKEND_TIMING and legend_field:
             print(f"\n[LEGEND QUERY DEBUG TIME OF DAY]:\n{query}\n")
 
-        arrow_data = session.sql(query).to_arrow()
+        response = stream_snowflake_result(session.sql(query))
         query_time = (time.time() - query_start) * 1000
 
-        arrow_bytes = snowflake_result_to_arrow(arrow_data)
-        total_time = (time.time() - request_start) * 1000
-
         if DEBUG_BACKEND_TIMING:
-            print(f"  [2] Time-of-day query: {query_time:.2f}ms")
-            print(f"  [TOTAL] /travel-time-by-time-of-day: {total_time:.2f}ms\n")
+            print(f"  [2] Time-of-day query: {query_time:.2f}ms (first chunk)")
+            print(f"  [TOTAL] /travel-time-by-time-of-day: {(time.time() - request_start) * 1000:.2f}ms to first chunk\n")
 
-        return create_arrow_response(arrow_bytes)
+        return response
 
     try:
         return handle_auth_error_retry(execute_query)
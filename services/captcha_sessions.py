@@ -11,6 +11,7 @@ import secrets
 import threading
 import time
 from dataclasses import dataclass
+from functools import lru_cache
 from typing import Dict
 
 from flask import Request
@@ -69,10 +70,16 @@ def consume_nonce(nonce: str) -> CaptchaNonce | None:
         return _nonces.pop(nonce, None)
 
 
+@lru_cache(maxsize=1)
+def _keyed_signer():
+    """HMAC keyed once; copying it skips re-deriving the key pads per token."""
+    return hmac.new(SECRET_KEY.encode("utf-8"), digestmod=hashlib.sha256)
+
+
 def _sign(nonce: str, timestamp: int) -> str:
-    payload = f"{nonce}:{timestamp}".encode("utf-8")
-    secret = SECRET_KEY.encode("utf-8")
-    return hmac.new(secret, payload, hashlib.sha256).hexdigest()
+    signer = _keyed_signer().copy()
+    signer.update(f"{nonce}:{timestamp}".encode("utf-8"))
+    return signer.hexdigest()
 
 
 def generate_token(nonce: str, timestamp: int | None = None) -> str:
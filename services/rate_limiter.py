@@ -1,13 +1,26 @@
 """
-Lightweight in-memory rate limiter utilities for the Flask app.
+Rate limiter utilities for the Flask app.
+
+Uses a Redis token bucket shared by every worker when ``RATE_LIMIT_REDIS_URL``
+is configured, otherwise falls back to a lightweight in-memory limiter.
 """
 
 from __future__ import annotations
 
+import logging
 import threading
 import time
 from collections import deque
-from typing import Deque, Dict, Tuple
+from typing import Deque, Dict, Iterable, Sequence, Tuple
+
+try:
+    import redis
+except ImportError:  # pragma: no cover - optional dependency
+    redis = None  # type: ignore
+
+from config import RATE_LIMIT_REDIS_URL
+
+LOGGER = logging.getLogger(__name__)
 
 
 class RateLimiter:
@@ -43,11 +56,180 @@ class RateLimiter:
             events.append(now)
             return True, None
 
+    def allow_many(self, checks: Iterable[Tuple[str, int, int]]) -> Tuple[bool, float | None]:
+        """
+        Check several (key, limit, window_seconds) limits as one request.
+
+        The request is counted against every key only if all of them allow it.
+        When denied, retry_after_seconds is the longest wait among the limits.
+        """
+        now = time.time()
+        retry_after = None
+
+        with self._lock:
+            windows = []
+            for key, limit, window_seconds in checks:
+                if limit <= 0 or window_seconds <= 0:
+                    continue
+                events = self._events.setdefault(key, deque())
+                window_start = now - window_seconds
+                while events and events[0] <= window_start:
+                    events.popleft()
+                if len(events) >= limit:
+                    wait = max(0.0, events[0] + window_seconds - now)
+                    retry_after = wait if retry_after is None else max(retry_after, wait)
+                windows.append(events)
+
+            if retry_after is not None:
+                return False, retry_after
+
+            for events in windows:
+                events.append(now)
+            return True, None
+
     def clear(self, key: str) -> None:
         """Remove all tracking data for a key."""
         with self._lock:
             self._events.pop(key, None)
 
 
-rate_limiter = RateLimiter()
+# Refill each bucket for the elapsed time, then take one token from every
+# bucket only if all of them have one. KEYS: one bucket per limit.
+# ARGV: now (seconds), then capacity and refill rate (tokens/second) per key.
+# Returns {allowed, retry_after_ms} with the longest wait when denied.
+_TOKEN_BUCKET_LUA = """
+local now = tonumber(ARGV[1])
+local allowed = 1
+local retry_after_ms = 0
+local tokens = {}
+
+for i, key in ipairs(KEYS) do
+    local capacity = tonumber(ARGV[i * 2])
+    local rate = tonumber(ARGV[i * 2 + 1])
+    local state = redis.call('HMGET', key, 'tokens', 'ts')
+    local current = tonumber(state[1])
+    local ts = tonumber(state[2])
+    if current == nil or ts == nil then
+        current = capacity
+        ts = now
+    end
+    current = math.min(capacity, current + math.max(0, now - ts) * rate)
+    if current < 1 then
+        allowed = 0
+        retry_after_ms = math.max(retry_after_ms, math.ceil((1 - current) / rate * 1000))
+    end
+    tokens[i] = current
+end
+
+for i, key in ipairs(KEYS) do
+    local capacity = tonumber(ARGV[i * 2])
+    local rate = tonumber(ARGV[i * 2 + 1])
+    local current = tokens[i]
+    if allowed == 1 then
+        current = current - 1
+    end
+    redis.call('HSET', key, 'tokens', tostring(current), 'ts', tostring(now))
+    redis.call('PEXPIRE', key, math.ceil(capacity / rate * 1000))
+end
+
+return {allowed, retry_after_ms}
+"""
+
+
+class RedisRateLimiter:
+    """
+    Token-bucket rate limiter stored in Redis so limits hold across workers.
+
+    Each bucket holds ``limit`` tokens and refills at ``limit / window_seconds``
+    tokens per second. Refill and consume run atomically in one Lua call, and
+    ``allow_many`` checks several buckets in that same call.
+    If Redis is unreachable the check falls back to a per-process limiter.
+
+    Denials are remembered locally until their retry deadline so a client that
+    keeps hammering a blocked key is rejected without another Redis call.
+    """
+
+    # Sweep expired local blocks once the table grows past this many keys.
+    _LOCAL_BLOCK_SWEEP_SIZE = 1024
+
+    def __init__(self, client) -> None:
+        self._client = client
+        # register_script issues EVALSHA and reloads the script if Redis lost it.
+        self._token_bucket = client.register_script(_TOKEN_BUCKET_LUA)
+        self._fallback = RateLimiter()
+        self._local_block: Dict[str, float] = {}
+        self._local_block_lock = threading.Lock()
+
+    def _check_local_block(self, key: str) -> float | None:
+        """Return seconds left on a cached denial for key, if any."""
+        deadline = self._local_block.get(key)
+        if deadline is None:
+            return None
+        remaining = deadline - time.monotonic()
+        if remaining > 0:
+            return remaining
+        self._local_block.pop(key, None)
+        return None
+
+    def _remember_block(self, key: str, retry_after: float) -> None:
+        now = time.monotonic()
+        with self._local_block_lock:
+            if len(self._local_block) >= self._LOCAL_BLOCK_SWEEP_SIZE:
+                self._local_block = {
+                    k: deadline for k, deadline in self._local_block.items() if deadline > now
+                }
+            self._local_block[key] = now + retry_after
+
+    def allow(self, key: str, limit: int, window_seconds: int) -> Tuple[bool, float | None]:
+        """Same contract as ``RateLimiter.allow``."""
+        return self.allow_many(((key, limit, window_seconds),))
+
+    def allow_many(self, checks: Iterable[Tuple[str, int, int]]) -> Tuple[bool, float | None]:
+        """Same contract as ``RateLimiter.allow_many``, in a single Redis round trip."""
+        active: Sequence[Tuple[str, int, int]] = [
+            check for check in checks if check[1] > 0 and check[2] > 0
+        ]
+        if not active:
+            return True, None
+
+        keys = [key for key, _, _ in active]
+        block_key = "|".join(keys)
+        blocked_for = self._check_local_block(block_key)
+        if blocked_for is not None:
+            return False, blocked_for
+
+        args = [time.time()]
+        for _, limit, window_seconds in active:
+            args.extend((limit, limit / window_seconds))
+        try:
+            allowed, retry_after_ms = self._token_bucket(keys=keys, args=args)
+        except redis.RedisError as exc:
+            LOGGER.warning("Redis rate limiter unavailable, using in-process limits: %s", exc)
+            return self._fallback.allow_many(active)
+
+        if int(allowed):
+            return True, None
+        retry_after = int(retry_after_ms) / 1000.0
+        self._remember_block(block_key, retry_after)
+        return False, retry_after
+
+    def clear(self, key: str) -> None:
+        """Remove all tracking data for a key."""
+        self._local_block.pop(key, None)
+        try:
+            self._client.delete(key)
+        except redis.RedisError as exc:
+            LOGGER.warning("Unable to clear rate limit key %s: %s", key, exc)
+        self._fallback.clear(key)
+
+
+def _create_rate_limiter():
+    if not RATE_LIMIT_REDIS_URL:
+        return RateLimiter()
+    if redis is None:
+        LOGGER.warning("RATE_LIMIT_REDIS_URL is set but the redis package is not installed; using in-process limits")
+        return RateLimiter()
+    return RedisRateLimiter(redis.Redis.from_url(RATE_LIMIT_REDIS_URL))
+
 
+rate_limiter = _create_rate_limiter()
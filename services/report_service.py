@@ -8,25 +8,10 @@ import io
 import math
 from collections import defaultdict
 from datetime import datetime, date, timedelta
+from functools import lru_cache
 from pathlib import Path
 from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
 
-try:
-    from fpdf import FPDF
-except ImportError:  # pragma: no cover - optional dependency during testing
-    FPDF = None  # type: ignore
-
-try:
-    import matplotlib
-
-    matplotlib.use("Agg")
-    from matplotlib import dates as mdates
-    from matplotlib import pyplot as plt
-except ImportError:  # pragma: no cover - optional dependency during testing
-    matplotlib = None  # type: ignore
-    mdates = None  # type: ignore
-    plt = None  # type: ignore
-
 from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 
 from config import (
@@ -44,6 +29,33 @@ from utils.query_utils import normalize_date
 from utils.error_handler import handle_auth_error_retry
 
 
+# Matplotlib (pyplot especially) takes most of a second to import, and the
+# monitoring query helpers here are used by API routes that never draw a
+# chart. Load it the first time a chart is rendered instead.
+mdates = None
+plt = None
+_matplotlib_import_failed = False
+
+
+def _load_matplotlib() -> bool:
+    """Import matplotlib on first use; return False when it is unavailable."""
+    global mdates, plt, _matplotlib_import_failed
+    if plt is not None:
+        return True
+    if _matplotlib_import_failed:
+        return False
+    try:
+        import matplotlib
+
+        matplotlib.use("Agg")
+        from matplotlib import dates as mdates
+        from matplotlib import pyplot as plt
+    except ImportError:  # pragma: no cover - optional dependency during testing
+        _matplotlib_import_failed = True
+        return False
+    return True
+
+
 def _percent(value: Optional[float]) -> str:
     if value is None:
         return "--"
@@ -459,7 +471,7 @@ def fetch_monitoring_rows(raw_filters: Dict[str, Any], limit: int = 10) -> List[
     )
 
     where_parts = [
-        "t.TIMESTAMP >= DATEADD(day, -9, DATE_TRUNC('day', CURRENT_TIMESTAMP()))",
+        "t.TIMESTAMP >= DATEADD(day, -9, CURRENT_DATE())",
     ]
 
     severity_threshold = _safe_float(filters.get("changepoint_severity_threshold"))
@@ -615,7 +627,7 @@ def fetch_monitoring_anomaly_rows(raw_filters: Dict[str, Any]) -> Tuple[List[Dic
         FROM TRAVEL_TIME_ANALYTICS t
         INNER JOIN distinct_dim d ON t.XD = d.XD
         LEFT JOIN signal_ids s ON t.XD = s.XD
-        WHERE t.DATE_ONLY >= DATEADD(day, -1, DATE_TRUNC('day', CURRENT_TIMESTAMP())){selected_clause_sql}
+        WHERE t.DATE_ONLY >= DATEADD(day, -1, CURRENT_DATE()){selected_clause_sql}
         GROUP BY ALL
     ),
     scored AS (
@@ -703,7 +715,7 @@ def fetch_monitoring_anomaly_rows(raw_filters: Dict[str, Any]) -> Tuple[List[Dic
         time_query = f"""
         WITH params AS (
             SELECT
-                DATEADD(day, -1, DATE_TRUNC('day', CURRENT_TIMESTAMP())) AS TARGET_DATE
+                DATEADD(day, -1, CURRENT_DATE()) AS TARGET_DATE
         )
         SELECT
             t.XD,
@@ -718,20 +730,26 @@ def fetch_monitoring_anomaly_rows(raw_filters: Dict[str, Any]) -> Tuple[List[Dic
         """
 
         series_map: Dict[int, List[Dict[str, Optional[float]]]] = defaultdict(list)
-        time_records = session.sql(time_query).collect()
-        for record in time_records:
-            data = record.as_dict() if hasattr(record, "as_dict") else dict(record)
+        # One row per XD per 15-minute bin; read the columns side by side
+        # instead of collecting Row objects and converting each to a dict
+        time_table = session.sql(time_query).to_arrow()
+        for xd_value, time_value, avg_actual, avg_prediction in zip(
+            time_table.column("XD").to_pylist(),
+            time_table.column("TIME_15MIN").to_pylist(),
+            time_table.column("AVG_ACTUAL").to_pylist(),
+            time_table.column("AVG_PREDICTION").to_pylist(),
+        ):
             try:
-                xd = int(data.get("XD"))
+                xd = int(xd_value)
             except (TypeError, ValueError):
                 continue
 
-            minutes = _minutes_from_value(data.get("TIME_15MIN"))
+            minutes = _minutes_from_value(time_value)
             if minutes is None:
                 continue
 
-            actual = _safe_float(data.get("AVG_ACTUAL"))
-            forecast = _safe_float(data.get("AVG_PREDICTION"))
+            actual = _safe_float(avg_actual)
+            forecast = _safe_float(avg_prediction)
             if math.isnan(actual) and math.isnan(forecast):
                 continue
             if math.isnan(actual):
@@ -809,19 +827,23 @@ def fetch_changepoint_detail_rows(xd: int, change_timestamp: Any) -> List[Dict[s
         if table.num_rows == 0:
             return []
 
+        # Walk the three columns side by side instead of building an
+        # intermediate dict per row with to_pylist()
         detail_rows: List[Dict[str, Any]] = []
-        for record in table.to_pylist():
-            timestamp = record.get("TIMESTAMP")
+        for timestamp, travel_time, period in zip(
+            table.column("TIMESTAMP").to_pylist(),
+            table.column("TRAVEL_TIME_SECONDS").to_pylist(),
+            table.column("PERIOD").to_pylist(),
+        ):
             if hasattr(timestamp, "to_pydatetime"):
                 timestamp = timestamp.to_pydatetime()
             if isinstance(timestamp, datetime):
                 timestamp = _to_local_naive(timestamp)
-            period_value = str(record.get("PERIOD") or "").lower()
             detail_rows.append(
                 {
                     "timestamp": timestamp,
-                    "travel_time_seconds": _safe_float(record.get("TRAVEL_TIME_SECONDS")),
-                    "period": period_value,
+                    "travel_time_seconds": _safe_float(travel_time),
+                    "period": str(period or "").lower(),
                 }
             )
 
@@ -864,18 +886,20 @@ def fetch_changepoint_hourly_series(xd: int, change_timestamp: Any) -> List[Dict
             return []
 
         hourly_rows: List[Dict[str, Any]] = []
-        for record in table.to_pylist():
-            hour_ts = record.get("HOUR_TS")
+        for hour_ts, avg_travel_time, period in zip(
+            table.column("HOUR_TS").to_pylist(),
+            table.column("AVG_TRAVEL_TIME").to_pylist(),
+            table.column("PERIOD").to_pylist(),
+        ):
             if hasattr(hour_ts, "to_pydatetime"):
                 hour_ts = hour_ts.to_pydatetime()
             if isinstance(hour_ts, datetime):
                 hour_ts = _to_local_naive(hour_ts)
-            period_value = str(record.get("PERIOD") or "").lower()
             hourly_rows.append(
                 {
                     "timestamp": hour_ts,
-                    "travel_time_seconds": _safe_float(record.get("AVG_TRAVEL_TIME")),
-                    "period": period_value,
+                    "travel_time_seconds": _safe_float(avg_travel_time),
+                    "period": str(period or "").lower(),
                 }
             )
 
@@ -975,7 +999,7 @@ def _format_minutes_label(value: float) -> str:
 
 def _render_anomaly_chart(series: Sequence[Dict[str, Any]]) -> Optional[bytes]:
     """Render an anomaly chart plotting actual vs forecast travel times."""
-    if plt is None or not series:
+    if not series or not _load_matplotlib():
         return None
 
     timestamps: List[datetime] = []
@@ -1068,7 +1092,7 @@ def _render_changepoint_composite_chart(
     time_series: Dict[str, List[Tuple[int, float]]],
 ) -> Optional[bytes]:
     """Render daily trend and time-of-day charts in a single figure."""
-    if plt is None:
+    if not _load_matplotlib():
         return None
 
     before_dates = date_series.get("before") or []
@@ -1162,7 +1186,7 @@ def _render_changepoint_composite_chart(
 
 def _collect_chart_images(meta: Dict[str, Any], date_series: Dict[str, Any], time_series: Dict[str, Any]) -> Dict[str, bytes]:
     """Generate chart image bytes for the PDF."""
-    if plt is None:
+    if not _load_matplotlib():
         return {}
 
     images: Dict[str, bytes] = {}
@@ -1487,7 +1511,13 @@ def _filters_detail_lines(filters: Dict[str, Any]) -> List[str]:
     return lines
 
 
-if FPDF is not None:
+@lru_cache(maxsize=1)
+def _monitoring_report_pdf_class():
+    """Build the PDF layout class on first use; fpdf is only needed for reports."""
+    try:
+        from fpdf import FPDF
+    except ImportError:  # pragma: no cover - optional dependency during testing
+        raise RuntimeError("fpdf2 package is required to generate monitoring reports") from None
 
     class MonitoringReportPDF(FPDF):
         """Custom PDF layout for monitoring reports."""
@@ -1523,11 +1553,7 @@ if FPDF is not None:
             self.cell(0, 6, page_text, align="R")
             self.set_text_color(0, 0, 0)
 
-else:  # pragma: no cover - executed only when dependency missing
-
-    class MonitoringReportPDF:  # type: ignore
-        def __init__(self, *_, **__):
-            raise RuntimeError("fpdf2 package is required to generate monitoring reports")
+    return MonitoringReportPDF
 
 
 def _ensure_space(pdf, required_height: float) -> None:
@@ -1675,12 +1701,12 @@ def build_monitoring_pdf(
     joke: Optional[Dict[str, Any]] = None,
     report_date: Optional[date] = None,
 ) -> bytes:
-    if plt is None:
+    if not _load_matplotlib():
         raise RuntimeError(
             "Matplotlib is required to render monitoring report charts. "
             "Install the 'matplotlib' package in the application environment."
         )
-    pdf = MonitoringReportPDF(orientation="P", unit="pt", format="A4")
+    pdf = _monitoring_report_pdf_class()(orientation="P", unit="pt", format="A4")
     pdf.set_margins(36, 36, 36)
     pdf.alias_nb_pages()
     pdf.set_auto_page_break(auto=True, margin=60)
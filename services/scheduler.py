@@ -6,7 +6,9 @@ from __future__ import annotations
 
 import atexit
 import logging
-from typing import Optional
+import os
+import tempfile
+from typing import IO, Optional
 
 try:
     from apscheduler.schedulers.background import BackgroundScheduler
@@ -14,15 +16,24 @@ try:
 except ImportError:  # pragma: no cover - optional dependency
     BackgroundScheduler = None  # type: ignore
     CronTrigger = None  # type: ignore
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not available on Windows
+    fcntl = None  # type: ignore
 from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 
 from config import DAILY_REPORT_SEND_HOUR, DAILY_REPORT_SEND_MINUTE, ENABLE_DAILY_REPORTS, TIMEZONE
-from services import report_service
 
 LOGGER = logging.getLogger(__name__)
 
 _scheduler: Optional[BackgroundScheduler] = None
 
+# Every gunicorn worker imports the app; an exclusive file lock makes sure only
+# one process per host runs the jobs. The OS drops the lock when that process
+# exits, so the replacement worker picks the scheduler back up.
+_PROCESS_LOCK_PATH = os.path.join(tempfile.gettempdir(), "signal-analytics-scheduler.lock")
+_process_lock: Optional[IO[str]] = None
+
 
 def _resolve_timezone() -> ZoneInfo:
     try:
@@ -32,6 +43,21 @@ def _resolve_timezone() -> ZoneInfo:
         return ZoneInfo("UTC")
 
 
+def _acquire_process_lock() -> bool:
+    """Claim the per-host scheduler lock without blocking."""
+    global _process_lock
+    if fcntl is None or _process_lock is not None:
+        return True
+    handle = open(_PROCESS_LOCK_PATH, "a")
+    try:
+        fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        handle.close()
+        return False
+    _process_lock = handle
+    return True
+
+
 def start_scheduler() -> None:
     """Start the APScheduler background job if enabled."""
     global _scheduler
@@ -46,6 +72,13 @@ def start_scheduler() -> None:
     if _scheduler and _scheduler.running:
         return
 
+    if not _acquire_process_lock():
+        LOGGER.info("Daily report scheduler already running in another worker process")
+        return
+
+    # Only load the report stack (matplotlib, fpdf) when the job is actually scheduled
+    from services import report_service
+
     timezone = _resolve_timezone()
     scheduler = BackgroundScheduler(timezone=timezone)
     trigger = CronTrigger(
@@ -0,0 +1,25 @@
+import pyarrow as pa
+
+from routes.api_anomalies import _summary_level
+from utils.arrow_utils import serialize_arrow_to_ipc
+
+
+def _combined():
+  # GROUPING SETS ((s.ID), (xd.XD)): signal rows have a null XD, XD rows a null ID
+  return serialize_arrow_to_ipc(pa.table({
+    "ID": ["S1", "S2", None, None],
+    "XD": pa.array([None, None, 101, 102], pa.int64()),
+    "ANOMALY_COUNT": [1, 2, 3, 4],
+  }))
+
+
+def test_summary_level_keeps_signal_rows():
+  table = pa.ipc.open_stream(_summary_level(_combined(), "XD")).read_all()
+  assert table.column_names == ["ID", "ANOMALY_COUNT"]
+  assert table.column("ID").to_pylist() == ["S1", "S2"]
+
+
+def test_summary_level_keeps_xd_rows():
+  table = pa.ipc.open_stream(_summary_level(_combined(), "ID")).read_all()
+  assert table.column_names == ["XD", "ANOMALY_COUNT"]
+  assert table.column("XD").to_pylist() == [101, 102]
@@ -0,0 +1,161 @@
+import pyarrow as pa
+import pytest
+from flask import Flask, Response
+from snowflake.snowpark.types import DecimalType, DoubleType, StringType, StructField, StructType
+
+from utils import arrow_utils
+from utils.result_cache import ResultCache
+
+
+class FakeDataFrame:
+  def __init__(self, batches, schema=None):
+    self._batches = batches
+    self.schema = schema or StructType([StructField("XD", DecimalType(38, 0))])
+
+  def to_arrow_batches(self):
+    return iter(self._batches)
+
+  def to_arrow(self):
+    raise AssertionError("zero-row results must not run the query again")
+
+
+@pytest.fixture(autouse=True)
+def request_context():
+  # stream_with_context needs an active request
+  with Flask(__name__).test_request_context("/api/test"):
+    yield
+
+
+def _read(payload):
+  return pa.ipc.open_stream(payload).read_all()
+
+
+def test_streamed_result_is_cached_once_complete(monkeypatch):
+  cache = ResultCache(ttl_seconds=60, max_entries=4)
+  monkeypatch.setattr(arrow_utils, "result_cache", cache)
+  batches = [pa.table({"XD": [1, 2]}), pa.table({"XD": [3]})]
+
+  response = arrow_utils.stream_snowflake_result(FakeDataFrame(batches), cache_key="q")
+  assert cache.get("q") is None
+
+  body = response.get_data()
+  assert _read(body).column("XD").to_pylist() == [1, 2, 3]
+  assert cache.get("q") == body
+
+
+def test_oversized_stream_is_not_cached(monkeypatch):
+  cache = ResultCache(ttl_seconds=60, max_entries=4, max_entry_bytes=16)
+  monkeypatch.setattr(arrow_utils, "result_cache", cache)
+
+  response = arrow_utils.stream_snowflake_result(
+    FakeDataFrame([pa.table({"XD": [1, 2]})]), cache_key="q"
+  )
+  assert _read(response.get_data()).num_rows == 2
+  assert cache.get("q") is None
+
+
+def test_empty_result_is_cached(monkeypatch):
+  cache = ResultCache(ttl_seconds=60, max_entries=4)
+  monkeypatch.setattr(arrow_utils, "result_cache", cache)
+
+  response = arrow_utils.stream_snowflake_result(FakeDataFrame([]), cache_key="q")
+  table = _read(response.get_data())
+  assert table.num_rows == 0
+  assert table.schema.field("XD").type == pa.int64()
+  assert cache.get("q") == response.get_data()
+
+
+def test_snowpark_schema_to_arrow_maps_column_types():
+  schema = arrow_utils.snowpark_schema_to_arrow(StructType([
+    StructField("ID", StringType()),
+    StructField("ANOMALY_COUNT", DecimalType(18, 0)),
+    StructField("ANOMALY_PERCENT", DoubleType()),
+  ]))
+  assert schema.names == ["ID", "ANOMALY_COUNT", "ANOMALY_PERCENT"]
+  assert schema.types == [pa.string(), pa.int64(), pa.float64()]
+
+
+def test_failed_chunk_aborts_stream_without_caching(monkeypatch):
+  cache = ResultCache(ttl_seconds=60, max_entries=4)
+  monkeypatch.setattr(arrow_utils, "result_cache", cache)
+
+  def batches():
+    yield pa.table({"XD": [1]})
+    raise RuntimeError("chunk fetch failed")
+
+  dataframe = FakeDataFrame([])
+  dataframe.to_arrow_batches = batches
+  response = arrow_utils.stream_snowflake_result(dataframe, cache_key="q")
+  with pytest.raises(RuntimeError):
+    response.get_data()
+  assert cache.get("q") is None
+
+
+def test_streamed_percentages_are_narrowed_to_float32(monkeypatch):
+  monkeypatch.setattr(arrow_utils, "result_cache", ResultCache(ttl_seconds=0, max_entries=0))
+  batches = [
+    pa.table({"XD": [1], "ANOMALY_PERCENT": [12.5]}),
+    pa.table({"XD": [2], "ANOMALY_PERCENT": [50.0]}),
+  ]
+
+  schema = StructType([
+    StructField("XD", DecimalType(38, 0)),
+    StructField("ANOMALY_PERCENT", DoubleType()),
+  ])
+
+  response = arrow_utils.stream_snowflake_result(FakeDataFrame(batches, schema))
+  table = _read(response.get_data())
+  assert table.schema.field("ANOMALY_PERCENT").type == pa.float32()
+  assert table.column("ANOMALY_PERCENT").to_pylist() == [12.5, 50.0]
+  assert table.schema.field("XD").type == pa.int64()
+
+
+def test_chunks_with_different_integer_widths_share_one_schema(monkeypatch):
+  monkeypatch.setattr(arrow_utils, "result_cache", ResultCache(ttl_seconds=0, max_entries=0))
+  # The connector narrows NUMBER(p,0) per chunk: int8 first, int16 later
+  batches = [
+    pa.table({"XD": pa.array([1], pa.int8())}),
+    pa.table({"XD": pa.array([300], pa.int16())}),
+  ]
+
+  response = arrow_utils.stream_snowflake_result(FakeDataFrame(batches))
+  table = _read(response.get_data())
+  assert table.schema.field("XD").type == pa.int64()
+  assert table.column("XD").to_pylist() == [1, 300]
+
+  empty = _read(arrow_utils.stream_snowflake_result(FakeDataFrame([])).get_data())
+  assert empty.schema == table.schema
+
+
+def test_conditional_cache_headers_answer_matching_etag_with_304():
+  app = Flask(__name__)
+
+  with app.test_request_context("/api/anomaly-summary"):
+    first = arrow_utils.add_conditional_cache_headers(
+      Response(b"payload", mimetype="application/octet-stream")
+    )
+  etag = first.headers["ETag"]
+  assert first.status_code == 200
+  assert "private" in first.headers["Cache-Control"]
+
+  with app.test_request_context("/api/anomaly-summary", headers={"If-None-Match": etag}):
+    repeat = arrow_utils.add_conditional_cache_headers(
+      Response(b"payload", mimetype="application/octet-stream")
+    )
+  assert repeat.status_code == 304
+
+
+def test_conditional_cache_headers_skip_post_and_streamed_responses():
+  app = Flask(__name__)
+
+  with app.test_request_context("/api/anomaly-summary", method="POST"):
+    response = arrow_utils.add_conditional_cache_headers(
+      Response(b"payload", mimetype="application/octet-stream")
+    )
+  assert "ETag" not in response.headers
+
+  with app.test_request_context("/api/anomaly-summary"):
+    response = arrow_utils.add_conditional_cache_headers(
+      Response(iter([b"payload"]), mimetype="application/octet-stream")
+    )
+  assert "ETag" not in response.headers
@@ -0,0 +1,12 @@
+from database import is_auth_error
+from utils.exceptions import InvalidQueryParameter
+
+
+def test_is_auth_error_matches_known_patterns():
+  assert is_auth_error(Exception("Authentication token has expired. The user must authenticate again."))
+  assert is_auth_error(Exception("390111 (08001): Session no longer exists. New login required to access the service."))
+  assert not is_auth_error(Exception("SQL compilation error: invalid identifier 'FOO'"))
+
+
+def test_is_auth_error_ignores_invalid_query_parameters():
+  assert not is_auth_error(InvalidQueryParameter("Invalid signal_ids value: 08001"))
@@ -0,0 +1,61 @@
+import pytest
+
+from utils.exceptions import InvalidQueryParameter
+from utils.query_utils import (
+  XD_ARRAY_FILTER_MIN_VALUES,
+  build_legend_filter,
+  build_time_of_day_predicate,
+  build_xd_filter,
+  build_xd_predicate,
+  normalize_date,
+  sanitize_identifier_list,
+)
+
+
+def test_build_xd_filter_uses_in_list_for_short_lists():
+  assert build_xd_filter([]) == ""
+  assert build_xd_filter([1, 2, 3]) == " AND XD IN (1, 2, 3)"
+
+
+def test_predicates_are_qualified_and_match_filters():
+  assert build_xd_predicate([3, 1]) == "t.XD IN (1, 3)"
+  assert build_xd_predicate([]) == ""
+  assert build_time_of_day_predicate(6, 0, 19, 0) == "t.TIME_15MIN BETWEEN '06:00:00' AND '19:14:59'"
+  assert build_time_of_day_predicate(None, None, None, None) == ""
+
+
+def test_legend_filter_reuses_main_xd_predicate():
+  predicate = build_xd_predicate([1, 2])
+
+  clause = build_legend_filter("COUNTY", 5, xd_predicate=predicate)
+  assert "FROM DIM_SIGNALS_XD t" in clause
+  assert f"WHERE {predicate}" in clause
+
+  clause = build_legend_filter("XD", 5, xd_predicate=predicate, start_date="2024-01-01", end_date="2024-01-31")
+  assert f"WHERE {predicate} AND t.DATE_ONLY BETWEEN '2024-01-01' AND '2024-01-31'" in clause
+
+
+def test_build_xd_filter_uses_array_literal_for_long_lists():
+  xds = list(range(XD_ARRAY_FILTER_MIN_VALUES))
+  clause = build_xd_filter(xds)
+
+  assert "FLATTEN(INPUT => PARSE_JSON('[0, 1, 2," in clause
+  assert clause.count(",") == len(xds) - 1
+
+
+def test_filters_render_the_same_sql_for_the_same_selection():
+  assert build_xd_filter([3, 1, 2, 1]) == build_xd_filter([1, 2, 3])
+  assert sanitize_identifier_list(["B", "A", "B"]) == ["A", "B"]
+
+
+def test_normalize_date_accepts_iso_and_other_formats():
+  assert normalize_date("2025-03-04") == "2025-03-04"
+  assert normalize_date("2025-03-04T23:15:00Z") == "2025-03-04"
+  assert normalize_date("2025-03-04T23:15:00-08:00") == "2025-03-04"
+  assert normalize_date("03/04/2025") == "2025-03-04"
+
+
+@pytest.mark.parametrize("value", [None, "", "  ", "not-a-date", "2025-13-01"])
+def test_normalize_date_rejects_invalid_values(value):
+  with pytest.raises(InvalidQueryParameter):
+    normalize_date(value)
@@ -0,0 +1,45 @@
+import pytest
+
+from services.rate_limiter import RateLimiter, RedisRateLimiter
+
+
+@pytest.fixture(params=["memory", "redis"])
+def limiter(request):
+  if request.param == "memory":
+    return RateLimiter()
+  fakeredis = pytest.importorskip("fakeredis")
+  return RedisRateLimiter(fakeredis.FakeRedis())
+
+
+def test_allow_blocks_after_limit(limiter):
+  for _ in range(3):
+    assert limiter.allow("rate:test", 3, 60) == (True, None)
+
+  allowed, retry_after = limiter.allow("rate:test", 3, 60)
+  assert allowed is False
+  assert 0 < retry_after <= 60
+
+
+def test_allow_many_is_all_or_nothing(limiter):
+  checks = [("rate:short", 5, 60), ("rate:long", 2, 3600)]
+
+  assert limiter.allow_many(checks) == (True, None)
+  assert limiter.allow_many(checks) == (True, None)
+
+  allowed, retry_after = limiter.allow_many(checks)
+  assert allowed is False
+  # The longer window is the one that ran out, so its wait is reported
+  assert retry_after > 60
+
+  # The denied request was not counted against the short window
+  for _ in range(3):
+    assert limiter.allow("rate:short", 5, 60) == (True, None)
+  assert limiter.allow("rate:short", 5, 60)[0] is False
+
+
+def test_clear_resets_key(limiter):
+  assert limiter.allow("rate:clear", 1, 60) == (True, None)
+  assert limiter.allow("rate:clear", 1, 60)[0] is False
+
+  limiter.clear("rate:clear")
+  assert limiter.allow("rate:clear", 1, 60) == (True, None)
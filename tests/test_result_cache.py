@@ -0,0 +1,59 @@
+from utils import result_cache as result_cache_module
+from utils.result_cache import ResultCache
+
+
+def test_get_returns_value_until_ttl_expires(monkeypatch):
+  now = [100.0]
+  monkeypatch.setattr(result_cache_module.time, "monotonic", lambda: now[0])
+  cache = ResultCache(ttl_seconds=10, max_entries=4)
+
+  cache.set("query", b"payload")
+  assert cache.get("query") == b"payload"
+
+  now[0] += 10
+  assert cache.get("query") is None
+
+
+def test_least_recently_used_entry_is_evicted():
+  cache = ResultCache(ttl_seconds=60, max_entries=2)
+  cache.set("a", b"1")
+  cache.set("b", b"2")
+  # Touch "a" so "b" becomes the eviction candidate
+  assert cache.get("a") == b"1"
+
+  cache.set("c", b"3")
+  assert cache.get("b") is None
+  assert cache.get("a") == b"1"
+  assert cache.get("c") == b"3"
+
+
+def test_disabled_when_ttl_is_zero():
+  cache = ResultCache(ttl_seconds=0, max_entries=2)
+  cache.set("a", b"1")
+  assert cache.get("a") is None
+
+
+def test_values_over_entry_limit_are_not_stored():
+  cache = ResultCache(ttl_seconds=60, max_entries=4, max_entry_bytes=4)
+  cache.set("a", b"1234")
+  cache.set("a", b"12345")
+  # The oversized value also drops the stale one it replaces
+  assert cache.get("a") is None
+
+
+def test_total_byte_budget_evicts_least_recently_used():
+  cache = ResultCache(ttl_seconds=60, max_entries=10, max_bytes=8)
+  cache.set("a", b"1234")
+  cache.set("b", b"1234")
+  assert cache.get("a") == b"1234"
+
+  cache.set("c", b"1234")
+  assert cache.get("b") is None
+  assert cache.get("a") == b"1234"
+  assert cache.get("c") == b"1234"
+
+  # Replacing an entry frees its old bytes
+  cache.set("c", b"12")
+  cache.set("d", b"12")
+  assert cache.get("a") == b"1234"
+  assert cache.get("d") == b"12"
@@ -3,10 +3,13 @@ Arrow serialization utilities for fast, low-overhead data transfer
 Optimized for small query response times
 """
 
+import io
 import pyarrow as pa
 import pyarrow.compute as pc
 from typing import Optional, Dict, Any
+from flask import Response, request, stream_with_context
 import config
+from utils.result_cache import result_cache
 
 # Pre-defined schemas to avoid recreation overhead
 SCHEMAS = {
@@ -47,7 +50,7 @@ SCHEMAS = {
         ('PREDICTION', pa.float64()),
         ('ANOMALY', pa.bool_()),
         ('ORIGINATED_ANOMALY', pa.bool_()),
-        ('ID', pa.string()),
+        ('ID', pa.dictionary(pa.int32(), pa.string())),
         ('LATITUDE', pa.float64()),
         ('LONGITUDE', pa.float64()),
         ('APPROACH', pa.bool_()),
@@ -59,7 +62,8 @@ SCHEMAS = {
 def serialize_arrow_to_ipc(arrow_table: pa.Table) -> bytes:
     """
     Convert Arrow table to IPC stream bytes with minimal overhead.
-    Optimized for small queries - uses single-pass serialization.
+    Writes the table once into a BytesIO, whose getvalue() hands back its
+    internal bytes object instead of copying the finished stream again.
 
     Note: Arrow IPC compression (LZ4/ZSTD) is not available in apache-arrow JS 21.0.0
     because compressionRegistry is not exposed in the public API. HTTP-level compression
@@ -71,27 +75,33 @@ def serialize_arrow_to_ipc(arrow_table: pa.Table) -> bytes:
     Returns:
         Serialized bytes in Arrow IPC format (uncompressed)
     """
-    sink = pa.BufferOutputStream()
+    sink = io.BytesIO()
+    _write_ipc_stream(sink, arrow_table)
+    return sink.getvalue()
+
+
+def _write_ipc_stream(sink, arrow_table: pa.Table) -> None:
+    # write_table splits chunks larger than max_chunksize itself (in C++), so
+    # large tables are still written in bounded batches without a Python loop
+    with pa.ipc.new_stream(sink, arrow_table.schema) as writer:
+        writer.write_table(arrow_table, max_chunksize=50000)
 
-    # For small tables (< 10K rows), write directly without batching
-    # This reduces overhead by ~40% for typical dashboard queries
-    if arrow_table.num_rows < 10000:
-        with pa.ipc.new_stream(sink, arrow_table.schema) as writer:
-            writer.write_table(arrow_table)
-    else:
-        # For larger tables, use batching to manage memory
-        batches = arrow_table.to_batches(max_chunksize=50000)
-        with pa.ipc.new_stream(sink, arrow_table.schema) as writer:
-            for batch in batches:
-                writer.write_batch(batch)
 
+def _serialize_empty(schema: pa.Schema) -> bytes:
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, schema):
+        pass  # Empty stream with schema only
     return sink.getvalue().to_pybytes()
 
 
+# Empty responses never change, so serialize each schema once at import
+_EMPTY_IPC = {name: _serialize_empty(schema) for name, schema in SCHEMAS.items()}
+
+
 def create_empty_arrow_response(schema_name: str) -> bytes:
     """
     Create empty Arrow IPC response for a given schema.
-    Pre-defined schemas avoid allocation overhead.
+    Returns bytes serialized once at import from the SCHEMAS dict.
 
     Args:
         schema_name: Name of schema from SCHEMAS dict
@@ -99,16 +109,10 @@ def create_empty_arrow_response(schema_name: str) -> bytes:
     Returns:
         Serialized empty Arrow table in IPC format
     """
-    schema = SCHEMAS.get(schema_name)
-    if not schema:
+    empty = _EMPTY_IPC.get(schema_name)
+    if empty is None:
         raise ValueError(f"Unknown schema: {schema_name}")
-
-    empty_table = pa.table([], schema=schema)
-    sink = pa.BufferOutputStream()
-    with pa.ipc.new_stream(sink, schema) as writer:
-        pass  # Empty stream with schema only
-
-    return sink.getvalue().to_pybytes()
+    return empty
 
 
 def create_arrow_response(data: bytes, status: int = 200) -> tuple:
@@ -125,18 +129,69 @@ def create_arrow_response(data: bytes, status: int = 200) -> tuple:
     return data, status, {'Content-Type': 'application/octet-stream'}
 
 
-def snowflake_result_to_arrow(arrow_table: pa.Table) -> bytes:
+def add_conditional_cache_headers(response: Response) -> Response:
     """
-    Convert Snowflake query result (already Arrow) to IPC bytes.
-    Converts timezone-naive timestamps to timezone-aware using configured timezone.
+    after_request hook that tags buffered Arrow GET responses with an ETag and
+    a short private max-age, answering a matching If-None-Match with 304.
+
+    Streamed responses are left alone: their body is not known up front. Once
+    such a result is served from result_cache it gets an ETag like any other.
 
     Args:
-        arrow_table: Arrow table from session.sql(query).to_arrow()
+        response: Outgoing Flask response
 
     Returns:
-        Serialized Arrow IPC bytes
+        The response, possibly converted to 304 Not Modified
+    """
+    if (
+        request.method != 'GET'
+        or response.status_code != 200
+        or response.is_streamed
+        or response.mimetype != 'application/octet-stream'
+    ):
+        return response
+
+    response.add_etag()
+    response.cache_control.private = True
+    response.cache_control.max_age = config.ARROW_RESPONSE_MAX_AGE_SECONDS
+    return response.make_conditional(request)
+
+
+# Display-only percentages (0-100). Snowflake has no 32-bit FLOAT (FLOAT4 is
+# an alias for the 64-bit type), so these are narrowed here instead of in SQL.
+FLOAT32_COLUMNS = frozenset({'ANOMALY_PERCENT'})
+
+
+def narrow_float_columns(arrow_table: pa.Table) -> pa.Table:
+    """
+    Cast FLOAT32_COLUMNS from float64 to float32, halving their wire size.
+
+    Args:
+        arrow_table: Arrow table (or result chunk) from Snowflake
+
+    Returns:
+        Arrow table with the listed columns as float32
+    """
+    schema = arrow_table.schema
+    for name in FLOAT32_COLUMNS:
+        i = schema.get_field_index(name)
+        if i >= 0 and pa.types.is_float64(schema.field(i).type):
+            arrow_table = arrow_table.set_column(
+                i, name, arrow_table.column(i).cast(pa.float32())
+            )
+    return arrow_table
+
+
+def localize_timestamps(arrow_table: pa.Table) -> pa.Table:
+    """
+    Convert timezone-naive timestamp columns to timezone-aware using configured timezone.
+
+    Args:
+        arrow_table: Arrow table (or result chunk) from Snowflake
+
+    Returns:
+        Arrow table with timezone-aware timestamp columns
     """
-    # Convert any timezone-naive timestamp columns to timezone-aware
     arrays = []
     for i, field in enumerate(arrow_table.schema):
         if pa.types.is_timestamp(field.type) and field.type.tz is None:
@@ -147,6 +202,202 @@ def snowflake_result_to_arrow(arrow_table: pa.Table) -> bytes:
             arrays.append(arrow_table.column(i))
 
     # Rebuild table with timezone-aware columns
-    arrow_table = pa.table(arrays, names=arrow_table.schema.names)
+    return pa.table(arrays, names=arrow_table.schema.names)
+
+
+def snowflake_result_to_arrow(arrow_table: pa.Table) -> bytes:
+    """
+    Convert Snowflake query result (already Arrow) to IPC bytes.
+    Converts timezone-naive timestamps to timezone-aware using configured timezone
+    and narrows FLOAT32_COLUMNS to float32.
+
+    Args:
+        arrow_table: Arrow table from session.sql(query).to_arrow()
+
+    Returns:
+        Serialized Arrow IPC bytes
+    """
+    return serialize_arrow_to_ipc(localize_timestamps(narrow_float_columns(arrow_table)))
 
-    return serialize_arrow_to_ipc(arrow_table)
+
+def cached_query_to_ipc(session, query: str) -> bytes:
+    """
+    Run a query and return its Arrow IPC bytes, reusing a recent identical result.
+
+    The SQL text fully encodes the request filters, so it is the cache key.
+
+    Args:
+        session: Snowpark session
+        query: SQL query string
+
+    Returns:
+        Serialized Arrow IPC bytes
+    """
+    arrow_bytes = result_cache.get(query)
+    if arrow_bytes is None:
+        arrow_bytes = snowflake_result_to_arrow(session.sql(query).to_arrow())
+        result_cache.set(query, arrow_bytes)
+    return arrow_bytes
+
+
+# Arrow types for Snowpark column types, used to describe zero-row results.
+# Matches what the Snowflake connector returns for non-empty results.
+_SNOWPARK_ARROW_TYPES = {
+    'ByteType': pa.int64(),
+    'ShortType': pa.int64(),
+    'IntegerType': pa.int64(),
+    'LongType': pa.int64(),
+    'FloatType': pa.float64(),
+    'DoubleType': pa.float64(),
+    'BooleanType': pa.bool_(),
+    'StringType': pa.string(),
+    'BinaryType': pa.binary(),
+    'DateType': pa.date32(),
+    'TimeType': pa.time64('ns'),
+}
+
+
+def snowpark_schema_to_arrow(struct_type) -> pa.Schema:
+    """
+    Build an Arrow schema from a Snowpark DataFrame schema.
+
+    Args:
+        struct_type: Snowpark StructType, e.g. session.sql(query).schema
+
+    Returns:
+        Arrow schema; unmapped column types become strings
+    """
+    fields = []
+    for field in struct_type.fields:
+        data_type = field.datatype
+        type_name = type(data_type).__name__
+        if type_name == 'DecimalType':
+            arrow_type = pa.int64() if data_type.scale == 0 else pa.float64()
+        elif type_name == 'TimestampType':
+            # NTZ stays naive (localize_timestamps applies TIMEZONE); LTZ/TZ
+            # values arrive tz-aware and keep their instant under UTC
+            tz = str(getattr(data_type, 'tz', '')).lower()
+            arrow_type = pa.timestamp('ns', tz='UTC' if tz in ('ltz', 'tz') else None)
+        else:
+            arrow_type = _SNOWPARK_ARROW_TYPES.get(type_name, pa.string())
+        # Quoted identifiers keep their quotes in Snowpark but not in results
+        name = field.name
+        if len(name) > 1 and name[0] == name[-1] == '"':
+            name = name[1:-1].replace('""', '"')
+        fields.append(pa.field(name, arrow_type))
+    return pa.schema(fields)
+
+
+def stream_snowflake_result(dataframe, cache_key: Optional[str] = None) -> Response:
+    """
+    Stream a Snowpark query result to the client as Arrow IPC, one Snowflake
+    result chunk at a time, instead of materializing the whole table first.
+
+    The query runs and the first chunk is fetched before the response starts,
+    so errors still surface inside handle_auth_error_retry. Peak memory is one
+    chunk, and the client starts receiving data as soon as it arrives.
+
+    The stream schema comes from the DataFrame's schema, which Snowpark
+    describes without running the query again, rather than from the first
+    chunk: the connector picks the narrowest integer width per chunk, so one
+    chunk may be int8 and the next int16. Every chunk is cast to the widened
+    schema, and zero-row results get an empty stream with the same types.
+
+    If a later chunk fails, the error is logged and re-raised so the server
+    aborts the response before the end-of-stream marker. The client then
+    fails to decode the truncated stream instead of showing partial data.
+
+    With a cache_key, the streamed bytes are also kept and stored in
+    result_cache once the stream completes. Buffering stops as soon as they
+    grow past the cache's per-entry limit.
+
+    Args:
+        dataframe: Snowpark DataFrame, e.g. session.sql(query)
+        cache_key: Optional result_cache key for the finished stream
+
+    Returns:
+        Streaming Flask response with Arrow IPC body
+    """
+    if cache_key is not None and not result_cache.enabled:
+        cache_key = None
+
+    empty = localize_timestamps(narrow_float_columns(
+        snowpark_schema_to_arrow(dataframe.schema).empty_table()
+    ))
+    schema = empty.schema
+
+    def conform(batch: pa.Table) -> pa.Table:
+        batch = localize_timestamps(narrow_float_columns(batch))
+        if batch.schema != schema:
+            batch = batch.cast(schema)
+        return batch
+
+    batches = dataframe.to_arrow_batches()
+    first = next(batches, None)
+    if first is None:
+        arrow_bytes = serialize_arrow_to_ipc(empty)
+        if cache_key is not None:
+            result_cache.set(cache_key, arrow_bytes)
+        return Response(arrow_bytes, mimetype='application/octet-stream')
+
+    first = conform(first)
+
+    def chunks():
+        sink = io.BytesIO()
+        try:
+            with pa.ipc.new_stream(sink, schema) as writer:
+                writer.write_table(first)
+                yield sink.getvalue()
+                sink.seek(0)
+                sink.truncate()
+                for batch in batches:
+                    writer.write_table(conform(batch))
+                    yield sink.getvalue()
+                    sink.seek(0)
+                    sink.truncate()
+        except Exception as e:
+            # The end-of-stream marker is never yielded, so the client cannot
+            # mistake the rows sent so far for the whole result
+            print(f"[ERROR] Arrow stream aborted mid-response: {e}")
+            raise
+        # End-of-stream marker written when the writer closes
+        yield sink.getvalue()
+
+    def generate():
+        if cache_key is None:
+            yield from chunks()
+            return
+        kept = []
+        kept_bytes = 0
+        for chunk in chunks():
+            if kept is not None:
+                kept_bytes += len(chunk)
+                if not result_cache.accepts_size(kept_bytes):
+                    kept = None
+                else:
+                    kept.append(chunk)
+            yield chunk
+        # Only reached when the whole stream was sent, never on a disconnect
+        if kept is not None:
+            result_cache.set(cache_key, b''.join(kept))
+
+    return Response(stream_with_context(generate()), mimetype='application/octet-stream')
+
+
+def stream_cached_query(session, query: str) -> Response:
+    """
+    Streaming counterpart of cached_query_to_ipc: a recent identical result
+    is returned from result_cache, otherwise the query is streamed with
+    stream_snowflake_result and cached as it completes.
+
+    Args:
+        session: Snowpark session
+        query: SQL query string (also the cache key)
+
+    Returns:
+        Flask response with Arrow IPC body
+    """
+    arrow_bytes = result_cache.get(query)
+    if arrow_bytes is not None:
+        return Response(arrow_bytes, mimetype='application/octet-stream')
+    return stream_snowflake_result(session.sql(query), cache_key=query)
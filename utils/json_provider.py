@@ -0,0 +1,35 @@
+"""
+Flask JSON provider backed by orjson when it is installed.
+"""
+
+from __future__ import annotations
+
+from typing import Any
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None  # type: ignore
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """
+    Serialize with orjson's C encoder while keeping Flask's output conventions.
+
+    Dates and any type orjson cannot encode natively are routed through
+    Flask's default handler, so responses look the same as with jsonify.
+    """
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        option = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+        if kwargs.get("sort_keys", self.sort_keys):
+            option |= orjson.OPT_SORT_KEYS
+        if kwargs.get("indent"):
+            option |= orjson.OPT_INDENT_2
+        default = kwargs.get("default", self.default)
+        return orjson.dumps(obj, default=default, option=option).decode("utf-8")
+
+    def loads(self, s: str | bytes, **kwargs: Any) -> Any:
+        return orjson.loads(s)
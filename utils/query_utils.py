@@ -4,23 +4,48 @@ Query utilities for building common SQL patterns and handling Snowflake results.
 
 import re
 from datetime import datetime
-from typing import Any, Dict, Iterable, List, Optional
-
-import pandas as pd
+from functools import lru_cache
+from typing import Any, Iterable, List, Optional
 
 from utils.exceptions import InvalidQueryParameter
 
 _IDENTIFIER_PATTERN = re.compile(r"^[A-Za-z0-9_\-]+$")
 
+# XD lists at least this long are bound as one array literal (see build_xd_filter)
+XD_ARRAY_FILTER_MIN_VALUES = 200
+
 
 def normalize_date(date_str: str) -> str:
     """
     Normalize date string to YYYY-MM-DD format.
     Raises InvalidQueryParameter if parsing fails.
     """
+    if isinstance(date_str, str):
+        return _normalize_date_text(date_str)
+    return _parse_date(date_str)
+
+
+@lru_cache(maxsize=1024)
+def _normalize_date_text(date_str: str) -> str:
+    # The same few date strings arrive on every dashboard refresh; failures
+    # raise and so are never cached
+    return _parse_date(date_str)
+
+
+def _parse_date(date_str: Any) -> str:
     if date_str is None or str(date_str).strip() == "":
         raise InvalidQueryParameter("Missing required date parameter.")
 
+    # The frontend always sends ISO dates, which the stdlib parses directly
+    try:
+        return datetime.fromisoformat(str(date_str).strip()).strftime("%Y-%m-%d")
+    except ValueError:
+        pass
+
+    # Anything else goes through pandas' lenient parser, imported here so
+    # loading the app doesn't pay for pandas up front
+    import pandas as pd
+
     try:
         parsed = pd.to_datetime(date_str, errors="raise")
     except Exception as exc:
@@ -47,13 +72,17 @@ def sanitize_identifier_list(
 ) -> List[str]:
     """
     Validate and normalize identifier lists used in SQL IN clauses.
+
+    Values are deduplicated and sorted so the same selection always renders
+    the same SQL text, which is what both the server result cache and
+    Snowflake's result cache key on.
     """
-    sanitized: List[str] = []
+    sanitized = set()
     for raw in values or []:
         clean = _sanitize_identifier(raw, param_name)
         if clean is not None:
-            sanitized.append(clean)
-    return sanitized
+            sanitized.add(clean)
+    return sorted(sanitized)
 
 
 def build_xd_dimension_query(
@@ -111,132 +140,43 @@ def build_xd_dimension_query(
     return query
 
 
-def extract_xd_values(dim_result) -> List[int]:
-    """
-    Extract XD values from dimension query result.
-    Handles Snowflake Row objects efficiently.
-
-    Args:
-        dim_result: Snowflake query result (list of Row objects)
-
-    Returns:
-        List of XD integer values
-    """
-    xd_values = []
-    for row in dim_result:
-        row_dict = row.as_dict()
-        xd = row_dict.get('XD')
-        if xd is not None:
-            xd_values.append(xd)
-    return xd_values
-
-
 def build_xd_filter(xd_values: List[int]) -> str:
     """
     Build SQL IN clause for XD filtering.
 
-    Args:
-        xd_values: List of XD integers
-
     Returns:
-        SQL fragment like "AND XD IN (123, 456, 789)"
+        SQL fragment like " AND XD IN (123, 456, 789)"
     """
-    if not xd_values:
-        return ""
+    predicate = build_xd_predicate(xd_values, column="XD")
+    return f" AND {predicate}" if predicate else ""
 
-    xd_str = ', '.join(map(str, xd_values))
-    return f" AND XD IN ({xd_str})"
 
-
-def build_xd_filter_with_joins(
-    session,
-    signal_ids: Optional[List[str]] = None,
-    maintained_by: str = 'all',
-    approach: Optional[str] = None,
-    valid_geometry: Optional[str] = None
-) -> Optional[List[int]]:
+def build_xd_predicate(xd_values: List[int], column: str = "t.XD") -> str:
     """
-    DEPRECATED: Use build_filter_joins_and_where() instead.
-
-    This function collects XDs in Python and returns them to be sent back to the database,
-    which is inefficient. Kept for backward compatibility only.
+    Build the bare XD IN predicate for a WHERE clause list.
 
-    Build XD filter using efficient JOIN-based query.
-    This is more efficient than the two-stage query pattern for large signal selections.
-
-    Uses MAX aggregation to handle duplicate XD entries in DIM_SIGNALS_XD where the same
-    XD can appear multiple times with different signal IDs.
+    Long lists (map selections, wide filters) are sent as a single JSON array
+    literal expanded with FLATTEN. Snowflake compiles one constant instead of
+    thousands of IN-list expressions, which dominates planning time for big
+    selections. Short lists keep the plain IN form so partition pruning on
+    the literal values still applies.
 
     Args:
-        session: Snowflake session object
-        signal_ids: List of signal IDs to filter (DIM_SIGNALS.ID)
-        maintained_by: One of 'all', 'odot', 'others'
-        approach: 'true'/'false' string for approach filter
-        valid_geometry: 'valid'/'invalid'/'all' for geometry filter
+        xd_values: List of XD integers
+        column: Qualified XD column to filter on
 
     Returns:
-        List of XD integers, or None if no filters applied (query all XDs)
+        SQL predicate like "t.XD IN (123, 456, 789)" or empty string
     """
-    sanitized_ids = sanitize_identifier_list(signal_ids, "signal_id") if signal_ids else []
-
-    # If no filters, return None to indicate "query all"
-    if (
-        not sanitized_ids
-        and maintained_by == 'all'
-        and not approach
-        and (not valid_geometry or valid_geometry == 'all')
-    ):
-        return None
-
-    # Build the filtered XD query with joins
-    query = """
-    SELECT
-        XD_TABLE.XD,
-        MAX(XD_TABLE.APPROACH) AS APPROACH,
-        MAX(XD_TABLE.VALID_GEOMETRY) AS VALID_GEOMETRY
-    FROM DIM_SIGNALS_XD AS XD_TABLE
-    """
-
-    # Add join to DIM_SIGNALS if needed
-    needs_signal_join = bool(sanitized_ids) or maintained_by != 'all'
-    if needs_signal_join:
-        query += " INNER JOIN DIM_SIGNALS AS SIG_TABLE ON XD_TABLE.ID = SIG_TABLE.ID"
-
-    # Build WHERE clause
-    where_parts = []
-
-    if sanitized_ids:
-        ids_str = "', '".join(sanitized_ids)
-        where_parts.append(f"SIG_TABLE.ID IN ('{ids_str}')")
-
-    if maintained_by == 'odot':
-        where_parts.append("SIG_TABLE.ODOT_MAINTAINED = TRUE")
-    elif maintained_by == 'others':
-        where_parts.append("SIG_TABLE.ODOT_MAINTAINED = FALSE")
-
-    if approach is not None and approach != '':
-        approach_bool = 'TRUE' if approach.lower() == 'true' else 'FALSE'
-        where_parts.append(f"XD_TABLE.APPROACH = {approach_bool}")
-
-    if valid_geometry is not None and valid_geometry != '' and valid_geometry != 'all':
-        if valid_geometry == 'valid':
-            where_parts.append("XD_TABLE.VALID_GEOMETRY = TRUE")
-        elif valid_geometry == 'invalid':
-            where_parts.append("XD_TABLE.VALID_GEOMETRY = FALSE")
-
-    if where_parts:
-        query += " WHERE " + " AND ".join(where_parts)
-
-    query += " GROUP BY XD_TABLE.XD"
+    if not xd_values:
+        return ""
 
-    # Execute query and extract XD values
-    try:
-        result = session.sql(query).collect()
-        xd_values = [row['XD'] for row in result]
-        return xd_values if xd_values else []
-    except Exception as e:
-        print(f"[ERROR] build_xd_filter_with_joins: {e}")
-        return []
+    # Canonical order so the same selection always yields the same SQL text
+    unique_xds = sorted({int(xd) for xd in xd_values})
+    xd_str = ', '.join(map(str, unique_xds))
+    if len(unique_xds) < XD_ARRAY_FILTER_MIN_VALUES:
+        return f"{column} IN ({xd_str})"
+    return f"{column} IN (SELECT VALUE::NUMBER FROM TABLE(FLATTEN(INPUT => PARSE_JSON('[{xd_str}]'))))"
 
 
 def build_filter_joins_and_where(
@@ -249,9 +189,6 @@ def build_filter_joins_and_where(
     Build SQL JOIN and WHERE clauses for filtering at the database level.
     This is the EFFICIENT way - all filtering happens in SQL, no XD collection in Python.
 
-    Use this function instead of build_xd_filter_with_joins() to avoid collecting XDs
-    and sending them back to the database.
-
     Args:
         signal_ids: List of signal IDs to filter (DIM_SIGNALS.ID)
         maintained_by: One of 'all', 'odot', 'others'
@@ -310,26 +247,7 @@ def build_filter_joins_and_where(
     return (join_clause, where_clause)
 
 
-def create_xd_lookup_dict(dim_result) -> Dict[int, Dict[str, Any]]:
-    """
-    Create XD -> signal info mapping from dimension query result.
-    Used for joining analytics data with dimension data.
-
-    Args:
-        dim_result: Snowflake query result (list of Row objects)
-
-    Returns:
-        Dictionary mapping XD to signal info dict
-    """
-    xd_dict = {}
-    for row in dim_result:
-        row_dict = row.as_dict()
-        xd = row_dict.get('XD')
-        if xd is not None:
-            xd_dict[xd] = row_dict
-    return xd_dict
-
-
+@lru_cache(maxsize=256)
 def get_aggregation_level(start_date: str, end_date: str) -> str:
     """
     Determine aggregation level based on date range.
@@ -357,36 +275,6 @@ def get_aggregation_level(start_date: str, end_date: str) -> str:
         return "none"
 
 
-def get_aggregation_table(start_date: str, end_date: str) -> str:
-    """
-    DEPRECATED: Kept for backward compatibility with anomalies routes.
-    Use get_aggregation_level() for new code.
-
-    Determine which table/view to query based on date range.
-
-    Args:
-        start_date: Start date string (YYYY-MM-DD format)
-        end_date: End date string (YYYY-MM-DD format)
-
-    Returns:
-        Table name: TRAVEL_TIME_ANALYTICS, TRAVEL_TIME_HOURLY_AGG, or TRAVEL_TIME_DAILY_AGG
-    """
-    try:
-        start = datetime.strptime(start_date, '%Y-%m-%d')
-        end = datetime.strptime(end_date, '%Y-%m-%d')
-        days = (end - start).days
-
-        if days < 4:
-            return "TRAVEL_TIME_ANALYTICS"
-        elif days <= 7:
-            return "TRAVEL_TIME_HOURLY_AGG"
-        else:
-            return "TRAVEL_TIME_DAILY_AGG"
-    except Exception:
-        # Default to base table if date parsing fails
-        return "TRAVEL_TIME_ANALYTICS"
-
-
 def build_day_of_week_filter(day_of_week: Optional[List[int]] = None) -> str:
     """
     Build SQL filter clause for day-of-week filtering with DIM_DATE join.
@@ -413,23 +301,25 @@ def build_day_of_week_filter(day_of_week: Optional[List[int]] = None) -> str:
         return ""
 
 
-def build_time_of_day_filter(
+def build_time_of_day_predicate(
     start_hour: Optional[int] = None,
     start_minute: Optional[int] = None,
     end_hour: Optional[int] = None,
-    end_minute: Optional[int] = None
+    end_minute: Optional[int] = None,
+    column: str = "t.TIME_15MIN"
 ) -> str:
     """
-    Build SQL filter clause for time-of-day filtering.
+    Build the bare time-of-day predicate for a WHERE clause list.
 
     Args:
         start_hour: Start hour (0-23), None means no filter
         start_minute: Start minute (0, 15, 30, 45), defaults to 0
         end_hour: End hour (0-23), None means no filter
         end_minute: End minute (0, 15, 30, 45), defaults to 59
+        column: Qualified TIME_15MIN column to filter on
 
     Returns:
-        SQL fragment like "AND TIME_15MIN BETWEEN '06:00:00' AND '19:14:59'" or empty string
+        SQL predicate like "t.TIME_15MIN BETWEEN '06:00:00' AND '19:14:59'" or empty string
     """
     if start_hour is None or end_hour is None:
         return ""
@@ -456,7 +346,7 @@ def build_time_of_day_filter(
 
         start_time = f"{start_h:02d}:{start_m:02d}:00"
         end_time = f"{end_h:02d}:{end_minute_seconds:02d}:59"
-        return f" AND TIME_15MIN BETWEEN '{start_time}' AND '{end_time}'"
+        return f"{column} BETWEEN '{start_time}' AND '{end_time}'"
     except (ValueError, TypeError):
         return ""
 
@@ -507,10 +397,9 @@ def build_legend_join(
 def build_legend_filter(
     legend_field: str,
     max_entities: int,
-    xd_filter: str = "",
+    xd_predicate: str = "",
     start_date: str = "",
     end_date: str = "",
-    time_filter: str = "",
     dow_join: str = ""
 ) -> str:
     """
@@ -523,63 +412,46 @@ def build_legend_filter(
     SPECIAL CASE FOR XD: When legend_field is 'XD', we need to query TRAVEL_TIME_ANALYTICS
     to get the top XDs by data volume, not just the dimension table.
 
+    The subqueries alias their table as t, so the main query's predicate
+    (from build_xd_predicate) applies unchanged inside them.
+
     Args:
         legend_field: The field to limit (e.g., 'COUNTY', 'BEARING', 'XD')
         max_entities: Maximum number of entities
-        xd_filter: XD filter like "AND XD IN (...)" - ONLY this is needed
+        xd_predicate: XD predicate like "t.XD IN (...)" - ONLY this is needed
 
     Returns:
-        SQL fragment like "AND s.COUNTY IN (SELECT DISTINCT ...)"
+        SQL fragment like "AND legend_xd.COUNTY IN (SELECT DISTINCT ...)"
     """
     if not legend_field:
         return ""
 
     # Special handling for XD legend - query actual data table for top XDs by volume
     if legend_field == 'XD':
-        where_clause = ""
-        if xd_filter:
-            clean_xd = xd_filter.strip()
-            if clean_xd.startswith('AND '):
-                clean_xd = clean_xd[4:].strip()
-            where_clause = f"WHERE {clean_xd}"
+        where_parts = [xd_predicate] if xd_predicate else []
 
         # Query TRAVEL_TIME_ANALYTICS for top XDs by data volume within date range
         if start_date and end_date:
-            date_filter = f"DATE_ONLY BETWEEN '{start_date}' AND '{end_date}'"
-            if where_clause:
-                where_clause += f" AND {date_filter}"
-            else:
-                where_clause = f"WHERE {date_filter}"
-
-        subquery = f"""SELECT XD
-            FROM TRAVEL_TIME_ANALYTICS
+            where_parts.append(f"t.DATE_ONLY BETWEEN '{start_date}' AND '{end_date}'")
+        where_clause = f"WHERE {' AND '.join(where_parts)}" if where_parts else ""
+
+        subquery = f"""SELECT t.XD
+            FROM TRAVEL_TIME_ANALYTICS t
             {where_clause}
-            GROUP BY XD
-            ORDER BY XD
+            GROUP BY t.XD
+            ORDER BY t.XD
             LIMIT {max_entities}"""
 
         return f" AND t.XD IN ({subquery})"
 
     # For non-XD legend fields, query DIM_SIGNALS_XD
-    where_clause = ""
-    if xd_filter:
-        # Remove leading AND and strip, then replace table alias
-        clean_xd = xd_filter.strip()
-        if clean_xd.startswith('AND '):
-            clean_xd = clean_xd[4:].strip()
-        # Replace t.XD with sub_s.XD
-        clean_xd = clean_xd.replace('t.XD', 'sub_s.XD')
-        if clean_xd and 'sub_s.XD' not in clean_xd and 'XD IN' in clean_xd:
-            # Handle case where it's just "XD IN (...)"
-            clean_xd = clean_xd.replace('XD IN', 'sub_s.XD IN')
-        if clean_xd:
-            where_clause = f"WHERE {clean_xd}"
+    where_clause = f"WHERE {xd_predicate}" if xd_predicate else ""
 
     # Build simple subquery - just query DIM_SIGNALS_XD with deterministic ordering
-    subquery = f"""SELECT DISTINCT sub_s.{legend_field}
-        FROM DIM_SIGNALS_XD sub_s
+    subquery = f"""SELECT DISTINCT t.{legend_field}
+        FROM DIM_SIGNALS_XD t
         {where_clause}
-        ORDER BY sub_s.{legend_field}
+        ORDER BY t.{legend_field}
         LIMIT {max_entities}"""
 
     return f" AND legend_xd.{legend_field} IN ({subquery})"
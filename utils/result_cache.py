@@ -0,0 +1,112 @@
+"""
+In-process TTL cache for serialized query results.
+
+Dashboard filters are re-sent unchanged on most interactions (map clicks,
+legend toggles, page switches), so identical queries are common. Caching the
+finished Arrow IPC bytes skips Snowflake and serialization entirely on a hit.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Hashable, Optional, Tuple
+
+from config import (
+    DEBUG_DISABLE_SERVER_CACHE,
+    RESULT_CACHE_MAX_BYTES,
+    RESULT_CACHE_MAX_ENTRIES,
+    RESULT_CACHE_MAX_ENTRY_BYTES,
+    RESULT_CACHE_TTL_SECONDS,
+)
+
+
+class ResultCache:
+    """
+    Thread-safe LRU cache whose entries expire after ``ttl_seconds``.
+
+    Values larger than ``max_entry_bytes`` are not stored, and least recently
+    used entries are evicted to keep the total under ``max_bytes``.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: float,
+        max_entries: int,
+        max_entry_bytes: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+    ) -> None:
+        self._ttl_seconds = ttl_seconds
+        self._max_entries = max_entries
+        self._max_entry_bytes = max_entry_bytes
+        self._max_bytes = max_bytes
+        self._entries: "OrderedDict[Hashable, Tuple[float, bytes]]" = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return not DEBUG_DISABLE_SERVER_CACHE and self._ttl_seconds > 0 and self._max_entries > 0
+
+    def accepts_size(self, size: int) -> bool:
+        """Whether a value of ``size`` bytes is small enough to be stored."""
+        return self._max_entry_bytes is None or size <= self._max_entry_bytes
+
+    def get(self, key: Hashable) -> Optional[bytes]:
+        """Return the cached value for key, or None if missing or expired."""
+        if not self.enabled:
+            return None
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= now:
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: bytes) -> None:
+        """Store value for key, evicting the least recently used entries."""
+        if not self.enabled:
+            return
+        size = len(value)
+        oversized = not self.accepts_size(size) or (
+            self._max_bytes is not None and size > self._max_bytes
+        )
+        expires_at = time.monotonic() + self._ttl_seconds
+        with self._lock:
+            # Any older value for key is stale either way
+            self._remove(key)
+            if oversized:
+                return
+            self._entries[key] = (expires_at, value)
+            self._total_bytes += size
+            while len(self._entries) > self._max_entries or (
+                self._max_bytes is not None and self._total_bytes > self._max_bytes
+            ):
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._total_bytes -= len(evicted)
+
+    def clear(self) -> None:
+        """Drop every cached entry."""
+        with self._lock:
+            self._entries.clear()
+            self._total_bytes = 0
+
+    def _remove(self, key: Hashable) -> None:
+        # Caller holds self._lock
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._total_bytes -= len(entry[1])
+
+
+result_cache = ResultCache(
+    RESULT_CACHE_TTL_SECONDS,
+    RESULT_CACHE_MAX_ENTRIES,
+    max_entry_bytes=RESULT_CACHE_MAX_ENTRY_BYTES,
+    max_bytes=RESULT_CACHE_MAX_BYTES,
+)